@@ -1,71 +1,166 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import get_db, ensure_table
+import asyncio
 import bcrypt
+import hashlib
 import jwt
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from app.models import User, UserType
+from app.models import User, UserType, RefreshToken
 from app.config import settings
+from app.permissions import invalidate_user
 
 router = APIRouter()
 
+# bcrypt is deliberately slow; run it on its own small pool so a login storm
+# queues here instead of occupying the threads data endpoints run on
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
 class LoginReq(BaseModel):
     email: str
     password: str
 
+class RefreshReq(BaseModel):
+    refresh_token: str
+
 class UserCreate(BaseModel):
     email: str
     password: str
     user_type: UserType
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def needs_rehash(hashed: str) -> bool:
+    # "$2b$12$<salt+hash>": the second field is the work factor
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def _in_hash_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
+# ===== REFRESH TOKENS =====
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def issue_tokens(db: Session, email: str, user_type: str) -> dict:
+    """Access JWT plus a new opaque, server-side refresh token"""
+    ensure_table(RefreshToken.__table__)
+    refresh_token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        token_hash=_token_hash(refresh_token),
+        user_email=email,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_DAYS),
+        revoked=False,
+    ))
+    db.commit()
+
+    return {
+        "ok": True,
+        "token": create_access_token(data={"sub": email, "user_type": user_type}),
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_MINUTES * 60,
+        "user_type": user_type,
+    }
+
+def revoke_user_tokens(db: Session, email: str):
+    ensure_table(RefreshToken.__table__)
+    db.query(RefreshToken).filter(RefreshToken.user_email == email).update({"revoked": True})
+    db.commit()
+
+def _rotate_refresh_token(db: Session, token: str) -> dict:
+    ensure_table(RefreshToken.__table__)
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == _token_hash(token)).first()
+    if stored is None or stored.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    # claim the token with one conditional UPDATE, so of two concurrent
+    # refreshes only one can rotate it
+    claimed = db.query(RefreshToken).filter(RefreshToken.id == stored.id, RefreshToken.revoked.is_(False)).update(
+        {"revoked": True}, synchronize_session=False
+    )
+    if claimed == 0:
+        # a rotated-out token came back: assume it leaked and end every session of the user
+        db.rollback()
+        revoke_user_tokens(db, stored.user_email)
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected")
+
+    # Handle dummy admin user for testing
+    if stored.user_email == "admin":
+        return issue_tokens(db, "admin", "superuser")
+
+    user = db.query(User).filter(User.email == stored.user_email).first()
+    if user is None:
+        db.commit()
+        raise HTTPException(status_code=401, detail="User not found")
+    return issue_tokens(db, user.email, user.user_type.value)
+
+# ===== ROUTES =====
+
 @router.post("/login")
-def login(payload: LoginReq, db: Session = Depends(get_db)):
+async def login(payload: LoginReq, db: Session = Depends(get_db)):
     # Dummy login for testing
     if payload.email == "admin" and payload.password == "admin123":
-        access_token = create_access_token(data={"sub": "admin", "user_type": "superuser"})
-        return {"ok": True, "token": access_token, "user_type": "superuser"}
-    
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+        return await run_in_threadpool(issue_tokens, db, "admin", "superuser")
+
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == payload.email).first())
+    if not user or not await _in_hash_pool(verify_password, payload.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    access_token = create_access_token(data={"sub": user.email, "user_type": user.user_type.value})
-    return {"ok": True, "token": access_token, "user_type": user.user_type.value}
+
+    # transparently move old hashes to the configured work factor
+    if needs_rehash(user.password_hash):
+        user.password_hash = await _in_hash_pool(hash_password, payload.password)
+        await run_in_threadpool(db.commit)
+
+    return await run_in_threadpool(issue_tokens, db, user.email, user.user_type.value)
+
+@router.post("/refresh")
+def refresh(payload: RefreshReq, db: Session = Depends(get_db)):
+    """Swap a refresh token for a new access + refresh token pair, no password needed"""
+    return _rotate_refresh_token(db, payload.refresh_token)
+
+@router.post("/logout")
+def logout(payload: RefreshReq, db: Session = Depends(get_db)):
+    ensure_table(RefreshToken.__table__)
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == _token_hash(payload.refresh_token)).first()
+    if stored is not None:
+        stored.revoked = True
+        db.commit()
+    return {"ok": True}
 
 @router.post("/users")
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
+async def create_user(payload: UserCreate, db: Session = Depends(get_db)):
     # In production, this should be protected and only allow superusers to create users
-    existing_user = db.query(User).filter(User.email == payload.email).first()
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == payload.email).first())
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
-    
-    hashed_password = hash_password(payload.password)
+
+    hashed_password = await _in_hash_pool(hash_password, payload.password)
     new_user = User(email=payload.email, password_hash=hashed_password, user_type=payload.user_type)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    def save():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+    await run_in_threadpool(save)
+    invalidate_user(new_user.email)
     return {"message": "User created successfully"}
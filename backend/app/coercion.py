@@ -0,0 +1,165 @@
+import math
+import re
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, Numeric, Date
+
+# Cells may hold several dates separated by newlines, commas or semicolons;
+# the earliest valid one wins.
+MULTI_DATE_SEP = r"[\n,;]+"
+ISO_DATE = r"^\d{4}-\d{2}-\d{2}"
+# what int() accepts from a string; "5.7", "12.0" and "1e3" are not integers
+INT_LITERAL = r"[+-]?\d+(?:_\d+)*"
+
+# ===== COLUMN KINDS =====
+
+def column_kind(col) -> str:
+    """Collapse a month-table column type (see dynamic_table._col_type_for_header)"""
+    if isinstance(col.type, Integer):
+        return "int"
+    if isinstance(col.type, Numeric):
+        return "numeric"
+    if isinstance(col.type, Date):
+        return "date"
+    return "text"
+
+# ===== SINGLE VALUE (CRUD) =====
+
+def _parse_date(value):
+    # ISO strings come from <input type="date"> and our own JSON; never dayfirst them
+    if isinstance(value, str) and re.match(ISO_DATE, value):
+        return pd.to_datetime(value, format="ISO8601", errors="coerce")
+    return pd.to_datetime(value, dayfirst=True, errors="coerce")
+
+def coerce_value(col, value):
+    """Coerce one raw value into the python type stored in `col`"""
+    # Handle pandas NaN explicitly
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+
+    kind = column_kind(col)
+
+    if value == "" or value == "NA":
+        return None if kind != "text" else "NA"
+
+    if kind == "int":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    if kind == "numeric":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    if kind == "date":
+        try:
+            if isinstance(value, str):
+                parts = [p.strip() for p in re.split(MULTI_DATE_SEP, value) if p.strip()]
+                if not parts:
+                    return None
+                parsed = [_parse_date(p) for p in parts]
+                valid = [d for d in parsed if not pd.isna(d)]
+                return min(valid).date() if valid else None
+
+            parsed = _parse_date(value)
+            if pd.isna(parsed):
+                return None
+            return parsed.date()
+        except Exception:
+            return None
+
+    return str(value)
+
+# ===== WHOLE COLUMNS (IMPORT) =====
+
+def _to_python(values: pd.Series) -> list:
+    """object list with None for missing, python scalars instead of numpy ones"""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def _coerce_dates(values: pd.Series) -> pd.Series:
+    # split multi-date strings, parse every part in one pass, keep the earliest
+    if (values.map(type) == str).any():
+        parts = values.str.split(MULTI_DATE_SEP, regex=True)
+        values = parts.where(parts.notna(), values).explode()
+    row_of_part = values.index.to_numpy()
+    parts = values.reset_index(drop=True)
+
+    is_str = parts.map(type) == str
+    if is_str.any():
+        parts[is_str] = parts[is_str].str.strip().replace("", None)
+    is_iso = is_str & parts.str.match(ISO_DATE, na=False) if is_str.any() else is_str
+
+    parsed = pd.to_datetime(parts.where(~is_iso, None), dayfirst=True, errors="coerce", format="mixed")
+    if is_iso.any():
+        parsed[is_iso] = pd.to_datetime(parts[is_iso], format="ISO8601", errors="coerce")
+
+    earliest = parsed.groupby(row_of_part).min()
+    return earliest.dt.date.astype(object).where(earliest.notna(), None)
+
+def coerce_series(values: pd.Series, col):
+    """Vectorized coerce_value over a whole column.
+
+    Returns (coerced python values, mask of raw values that could not be
+    converted).
+    """
+    values = values.reset_index(drop=True).astype(object)
+    kind = column_kind(col)
+
+    missing = values.isna()
+    is_str = values.map(type) == str
+    blank = is_str & values.isin(["", "NA"])
+
+    if kind == "text":
+        out = values.astype(str).astype(object).where(~missing, None).where(~blank, "NA")
+        return out.tolist(), pd.Series(False, index=values.index)
+
+    present = ~(missing | blank)
+    candidates = values.where(present, None)
+
+    if kind == "int":
+        text = is_str & present
+        if text.any():
+            stripped = candidates[text].str.strip()
+            literal = stripped.str.fullmatch(INT_LITERAL, na=False)
+            candidates = candidates.copy()
+            candidates[text] = stripped.where(literal, None).str.replace("_", "", regex=False)
+        # real numbers from the sheet are truncated, as int() does
+        coerced = np.trunc(pd.to_numeric(candidates, errors="coerce")).astype("Int64")
+    elif kind == "numeric":
+        coerced = pd.to_numeric(candidates, errors="coerce").astype(float)
+    else:
+        coerced = _coerce_dates(candidates)
+
+    failed = present & coerced.isna()
+    return _to_python(coerced), failed
+
+def coerce_frame(df: pd.DataFrame, cols):
+    """Coerce a sheet into insert-ready records keyed by column key.
+
+    Returns (records, failures) where failures lists, per column, how many
+    cells could not be converted (they are stored as NULL) and a few samples.
+    """
+    n = len(df)
+    coerced = {}
+    failures = []
+    for col in cols:
+        if col.name not in df.columns:
+            coerced[col.key] = [None] * n
+            continue
+
+        values, failed = coerce_series(df[col.name], col)
+        coerced[col.key] = values
+        if failed.any():
+            raw = df[col.name].reset_index(drop=True)[failed]
+            failures.append({
+                "column": col.name,
+                "failed": int(failed.sum()),
+                "samples": [str(v) for v in raw.head(3).tolist()],
+            })
+
+    keys = list(coerced)
+    records = [dict(zip(keys, row)) for row in zip(*coerced.values())]
+    return records, failures
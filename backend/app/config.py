@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 from pathlib import Path
 
 
@@ -9,7 +9,43 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # bytes, default 5 MB
     ALLOW_WRITE: bool = True
     LOG_FILE: str = "app.log"
+    LOG_STDERR: bool = False  # also write the JSON lines to stderr
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: Dict[str, str] = {}  # per-logger overrides, e.g. {"app.schedules": "DEBUG"}
+    DATABASE_URL: str = "mysql+pymysql://root@localhost:3306/scheduling_app"  # sqlite:///path.db runs without MySQL
+    DB_POOL_SIZE: int = 10  # persistent connections per worker process
+    DB_MAX_OVERFLOW: int = 20  # extra connections allowed under bursts
+    DB_POOL_RECYCLE: int = 1800  # seconds; stay under MySQL wait_timeout
+    DB_POOL_TIMEOUT: float = 10  # seconds to wait for a free connection before erroring
+    DB_ISOLATION_LEVEL: str = ""  # e.g. "READ COMMITTED", empty keeps the server default
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # MySQL max_execution_time for SELECTs, 0 = no limit
+    DATABASE_REPLICA_URLS: List[str] = []  # read-only copies for listings and exports, JSON list in .env
+    REPLICA_MAX_LAG_SECONDS: int = 5  # a MySQL replica further behind is skipped, 0 = don't check
+    REPLICA_RETRY_SECONDS: int = 30  # how long a failed / lagging replica is left out
+    READ_AFTER_WRITE_SECONDS: int = 5  # reads of a client that just wrote stay on the primary
+    ASYNC_DB: bool = False  # serve open_table / list_rows and their auth from an async engine
+    ASYNC_DATABASE_URL: str = ""  # empty derives it from DATABASE_URL (aiomysql / aiosqlite drivers)
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
+    DEFAULT_PAGE_SIZE: int = 500
+    MAX_PAGE_SIZE: int = 5000
+    IMPORT_BATCH_SIZE: int = 1000  # rows per INSERT executemany / commit
+    IMPORT_BATCH_SIZE_MAX: int = 20000  # upper bound for a ?batch_size= override
+    IMPORT_READ_CHUNK: int = 5000  # sheet rows parsed and coerced at a time
+    EXPORT_CHUNK_SIZE: int = 2000  # rows fetched per server-side cursor round trip
+    IMPORT_JOB_WORKERS: int = 2  # background imports running at once
+    IMPORT_JOB_MAX_PENDING: int = 10  # running + queued jobs before new uploads get 429
+    IMPORT_JOB_RETENTION: int = 3600  # seconds a finished job stays pollable
+    IMPORT_SPOOL_DIR: str = ""  # where uploads wait for their job, default system temp dir
+    ACCESS_TOKEN_MINUTES: int = 15
+    REFRESH_TOKEN_DAYS: int = 7
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on the next successful login
+    PASSWORD_HASH_WORKERS: int = 4  # threads reserved for bcrypt, apart from the request threadpool
+    COMPRESS_MIN_SIZE: int = 1024  # bytes; smaller JSON bodies go out uncompressed
+    GZIP_LEVEL: int = 5
+    BROTLI_QUALITY: int = 4  # brotli is used when installed and accepted by the client
+    USER_CACHE_TTL: int = 60  # seconds a resolved user is reused, 0 disables the cache
+    USER_CACHE_SIZE: int = 1024
+    TABLE_SCHEMA_TTL: int = 600  # seconds between schema re-checks of a month table, 0 = until invalidated
 
     class Config:
         env_file = str(Path(__file__).resolve().parents[1] / ".env")
@@ -7,10 +7,19 @@ from sqlalchemy import (
     Numeric,
     Text,
     String,
+    Index,
 )
 from sqlalchemy import inspect, text
 from app.database import Base, engine
+from app.config import settings
+import asyncio
 import datetime
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # ===== EXACT HEADERS (SOURCE OF TRUTH) =====
 
@@ -68,9 +77,236 @@ def _make_safe_key(header: str) -> str:
         key = "_" + key
     return key.upper()
 
+# ===== SECONDARY INDEXES =====
+
+# Columns planners filter and sort on, per sheet type; a tuple of several
+# columns is one composite index (leftmost column first). EPICOR NO has its
+# own unique index.
+GROUP_A_INDEXES = [
+    ("OA",),
+    ("CUSTOMER NAME",),
+    ("AGENTS",),
+    ("EDD",),
+    ("REVISED EDD",),
+    ("DESPATCH DATE",),
+    ("PROJECT STATUS", "EDD"),
+    ("FACTORY STATUS", "DESPATCH DATE"),
+]
+
+SHUTDOWN_INDEXES = [
+    ("OA",),
+    ("CUSTOMER NAME",),
+    ("AGENTS",),
+    ("EDD",),
+    ("REVISED EDD",),
+    ("DESPATCH DATE",),
+    ("PROJECT STATUS", "EDD"),
+    ("FACTORY STATUS", "DESPATCH DATE"),
+]
+
+MAX_INDEX_NAME = 64  # MySQL identifier limit
+
+
+def index_specs(sheet_type: str, headers=None):
+    """Index column tuples for a sheet type, limited to `headers` when given"""
+    specs = SHUTDOWN_INDEXES if sheet_type == "shutdown" else GROUP_A_INDEXES
+    if headers is None:
+        return list(specs)
+    return [cols for cols in specs if all(c in headers for c in cols)]
+
+
+def index_name(table_name: str, columns) -> str:
+    name = f"ix_{table_name}_" + "_".join(_make_safe_key(c) for c in columns)
+    if len(name) > MAX_INDEX_NAME:
+        name = name[:MAX_INDEX_NAME - 9] + "_" + hashlib.sha1(name.encode()).hexdigest()[:8]
+    return name
+
+
+def _covered(columns, existing) -> bool:
+    # an index whose leading columns are `columns` serves the same lookups
+    return any(tuple(cols[:len(columns)]) == tuple(columns) for cols in existing)
+
+
+def _existing_index_columns(inspector, table_name: str) -> list:
+    existing = [tuple(ix["column_names"]) for ix in inspector.get_indexes(table_name)]
+    existing += [tuple(uc["column_names"]) for uc in inspector.get_unique_constraints(table_name)]
+    return existing
+
+
+def missing_indexes(inspector, table_name: str, sheet_type: str, headers) -> list:
+    """[(index name, columns)] of the spec not covered by an index on the table"""
+    existing = _existing_index_columns(inspector, table_name)
+    return [
+        (index_name(table_name, cols), cols)
+        for cols in index_specs(sheet_type, headers)
+        if not _covered(cols, existing)
+    ]
+
+
+def create_indexes(table_name: str, indexes) -> list:
+    """Add `indexes` [(name, columns)] in one DDL step; returns the names created.
+
+    MySQL gets a single ALTER TABLE ... ADD INDEX, ADD INDEX (one pass over
+    the table, online with LOCK=NONE); SQLite, which has no multi-index
+    ALTER, runs the CREATE INDEX statements in one transaction.
+    """
+    if not indexes:
+        return []
+    quote = engine.dialect.identifier_preparer.quote
+
+    def cols_sql(cols):
+        return ", ".join(quote(c) for c in cols)
+
+    started = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            if engine.dialect.name == "mysql":
+                adds = ", ".join(f"ADD INDEX {quote(name)} ({cols_sql(cols)})" for name, cols in indexes)
+                conn.execute(text(f"ALTER TABLE {quote(table_name)} {adds}, ALGORITHM=INPLACE, LOCK=NONE"))
+            else:
+                for name, cols in indexes:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table_name)} ({cols_sql(cols)})"))
+    except Exception:
+        logger.warning("Failed to add indexes to %s", table_name, exc_info=True, extra={"table": table_name})
+        return []
+
+    names = [name for name, _ in indexes]
+    logger.info(
+        "added %s indexes to %s", len(names), table_name,
+        extra={"table": table_name, "indexes": names, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)},
+    )
+    return names
+
+
+def ensure_indexes(table_name: str, sheet_type: str = "group_a") -> list:
+    """Bring an existing month table's secondary indexes up to the spec; returns the names added"""
+    inspector = inspect(engine)
+    headers = {c["name"] for c in inspector.get_columns(table_name)}
+    added = create_indexes(table_name, missing_indexes(inspector, table_name, sheet_type, headers))
+    if added:
+        invalidate_table(table_name)
+    return added
+
+
+def _index_usage(table_name: str):
+    """{index name or None (= no index, full scan): rows read} from MySQL's performance_schema.
+
+    None where the backend keeps no such statistics (SQLite) or
+    performance_schema is off.
+    """
+    if engine.dialect.name != "mysql":
+        return None
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT INDEX_NAME, COUNT_READ FROM performance_schema.table_io_waits_summary_by_index_usage "
+                    "WHERE OBJECT_SCHEMA = DATABASE() AND OBJECT_NAME = :t"
+                ),
+                {"t": table_name},
+            ).all()
+    except Exception:
+        return None
+    return {name: int(reads) for name, reads in rows}
+
+
+def index_report(table_name: str, sheet_type: str = "group_a") -> dict:
+    """Indexes of a month table with their read counts, and the spec indexes it lacks"""
+    inspector = inspect(engine)
+    headers = {c["name"] for c in inspector.get_columns(table_name)}
+    usage = _index_usage(table_name)
+    specs = index_specs(sheet_type, headers)
+
+    indexes = []
+    for ix in inspector.get_indexes(table_name):
+        cols = tuple(ix["column_names"])
+        indexes.append({
+            "name": ix["name"],
+            "columns": list(cols),
+            "unique": bool(ix.get("unique")),
+            "in_spec": any(cols[:len(spec)] == spec for spec in specs),
+            "rows_read": usage.get(ix["name"]) if usage is not None else None,
+        })
+
+    return {
+        "table": table_name,
+        "sheet_type": sheet_type,
+        "indexes": indexes,
+        "missing": [{"name": name, "columns": list(cols)} for name, cols in missing_indexes(inspector, table_name, sheet_type, headers)],
+        # rows read without any index: a high number next to missing indexes is the full scan to fix
+        "table_scan_rows_read": usage.get(None) if usage is not None else None,
+        "usage_available": usage is not None,
+    }
+
+# ===== TABLE REGISTRY =====
+
+# table_name -> {"model", "sheet_type", "columns", "verified_at"}
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _is_fresh(entry, sheet_type: str) -> bool:
+    if entry is None or entry["sheet_type"] != sheet_type:
+        return False
+    ttl = settings.TABLE_SCHEMA_TTL
+    if ttl <= 0:
+        return True
+    return time.monotonic() - entry["verified_at"] < ttl
+
+
+def invalidate_table(table_name: str = None):
+    """Forget verified schema state so the next lookup re-checks the DB.
+
+    With no table_name the whole registry is cleared.
+    """
+    with _registry_lock:
+        if table_name is None:
+            _registry.clear()
+        else:
+            _registry.pop(table_name, None)
+
+
+def get_table_columns(table_name: str, sheet_type: str = "group_a"):
+    """Data columns (everything except id) of a month table, in header order"""
+    return _table_entry(table_name, sheet_type)["columns"]
+
 # ===== MAIN FACTORY =====
 
 def get_table_class(table_name: str, sheet_type: str = "group_a"):
+    return _table_entry(table_name, sheet_type)["model"]
+
+
+def _table_entry(table_name: str, sheet_type: str) -> dict:
+    # fast path: schema already verified by this process
+    entry = _registry.get(table_name)
+    if _is_fresh(entry, sheet_type):
+        return entry
+
+    with _registry_lock:
+        entry = _registry.get(table_name)
+        if _is_fresh(entry, sheet_type):
+            return entry
+
+        model = _reconcile_table_class(table_name, sheet_type)
+        entry = _registry[table_name] = {
+            "model": model,
+            "sheet_type": sheet_type,
+            "columns": [c for c in model.__table__.columns if c.name != "id"],
+            "verified_at": time.monotonic(),
+        }
+        return entry
+
+
+
+async def get_table_class_async(table_name: str, sheet_type: str = "group_a"):
+    """get_table_class for coroutines: the schema check (sync engine) runs in a thread"""
+    entry = _registry.get(table_name)
+    if _is_fresh(entry, sheet_type):
+        return entry["model"]
+    return await asyncio.to_thread(get_table_class, table_name, sheet_type)
+
+
+def _reconcile_table_class(table_name: str, sheet_type: str = "group_a"):
     metadata = Base.metadata
 
     # reuse table if already defined
@@ -97,9 +333,12 @@ def get_table_class(table_name: str, sheet_type: str = "group_a"):
             )
 
         table = Table(table_name, metadata, *columns)
-        metadata.create_all(bind=engine)
+        for cols in index_specs(sheet_type, headers):
+            Index(index_name(table_name, cols), *(table.c[_make_safe_key(c)] for c in cols))
+        table.create(bind=engine, checkfirst=True)
 
     # Ensure existing DB table has expected columns; if not, ALTER TABLE to add them
+    inspector = None
     try:
         inspector = inspect(engine)
         existing = {c["name"] for c in inspector.get_columns(table_name)}
@@ -109,7 +348,7 @@ def get_table_class(table_name: str, sheet_type: str = "group_a"):
     # Map to SQL types and add missing columns
     def _sql_type_for_header(header: str, sheet_type: str = "group_a") -> str:
         t = _col_type_for_header(header, sheet_type)
-        # Map SQLAlchemy types to MySQL type strings
+        # Map SQLAlchemy types to SQL type strings (valid on MySQL and SQLite)
         if isinstance(t, type) and t is Integer:
             return "INT"
         if isinstance(t, Numeric) or getattr(t, "__class__", None).__name__ == 'Numeric':
@@ -127,21 +366,26 @@ def get_table_class(table_name: str, sheet_type: str = "group_a"):
         return "VARCHAR(255)"
 
 
+    # identifier quoting of the backend in use (backticks on MySQL, double quotes on SQLite)
+    quote = engine.dialect.identifier_preparer.quote
+
     missing = [h for h in headers if h not in existing]
     if missing:
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             for h in missing:
                 sql_type = _sql_type_for_header(h, sheet_type)
-                alter = f"ALTER TABLE `{table_name}` ADD COLUMN `{h}` {sql_type} NULL"
+                alter = f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(h)} {sql_type} NULL"
                 try:
                     conn.execute(text(alter))
                 except Exception:
                     # best-effort: ignore failures here (could be concurrent or permissions)
-                    print(f"Failed to add column {h} to {table_name}")
+                    logger.warning("Failed to add column %s to %s", h, table_name, exc_info=True, extra={"table": table_name})
     # Ensure EPICOR NO has a unique constraint/index
     try:
         ucs = inspector.get_unique_constraints(table_name)
         uc_cols = {col for uc in ucs for col in uc.get("column_names", [])}
+        # SQLite reports CREATE UNIQUE INDEX only as an index
+        uc_cols |= {col for ix in inspector.get_indexes(table_name) if ix.get("unique") for col in ix["column_names"]}
     except Exception:
         uc_cols = set()
 
@@ -149,12 +393,25 @@ def get_table_class(table_name: str, sheet_type: str = "group_a"):
         if "EPICOR NO" not in uc_cols:
             # create a unique index (best-effort)
             idx_name = f"ux_{table_name}_EPICOR_NO"
-            add_unique_sql = f"ALTER TABLE `{table_name}` ADD UNIQUE INDEX `{idx_name}` (`EPICOR NO`)"
+            add_unique_sql = f"CREATE UNIQUE INDEX {quote(idx_name)} ON {quote(table_name)} ({quote('EPICOR NO')})"
             try:
-                with engine.connect() as conn:
+                with engine.begin() as conn:
                     conn.execute(text(add_unique_sql))
             except Exception:
-                print(f"Failed to add unique index for EPICOR NO on {table_name}")
+                logger.warning("Failed to add unique index for EPICOR NO on %s", table_name, exc_info=True, extra={"table": table_name})
+
+    # secondary indexes from the spec: only reported here, building them on
+    # a big table is left to POST /schedules/admin/indexes/reconcile
+    try:
+        present = set(headers) | existing
+        missing = missing_indexes(inspector, table_name, sheet_type, present)
+        if missing:
+            logger.warning(
+                "%s is missing indexes %s; run /schedules/admin/indexes/reconcile",
+                table_name, ", ".join(name for name, _ in missing), extra={"table": table_name},
+            )
+    except Exception:
+        logger.warning("Failed to check indexes of %s", table_name, exc_info=True, extra={"table": table_name})
 
     # cache mapped class so SQLAlchemy doesn’t remap
     if hasattr(table, "_mapped_class"):
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, Base
+from app.database import SessionLocal, get_read_db, ensure_table
 from app.models import USLLCOrders, UrgentOrders, RegularOrders, DoubtfulOrders, DomesticOrders, WabtecOrders
-from app.models import Base
-from app.database import engine
+from app.responses import model_listing
 
-Base.metadata.create_all(bind=engine)
+# main.py mounts only the read-only listings; the unchecked POST stays off the app
 router = APIRouter()
+listing_router = APIRouter()
 
 tables = {
     "us_llc": USLLCOrders,
@@ -26,10 +27,20 @@ def get_db():
         db.close()
 
 
-@router.get("/{table}")
-def get_rows(table: str, db: Session = Depends(get_db)):
+@listing_router.get("/{table}")
+def get_rows(
+    table: str,
+    request: Request,
+    shape: str = "rows",
+    fields: Optional[str] = None,  # e.g. OA,EPICOR_NO,EDD
+    limit: Optional[int] = None,
+    after: Optional[int] = None,  # id cursor, from X-Next-Cursor or the last streamed row
+    fmt: str = Query("json", alias="format"),  # "ndjson" streams every matching row
+    db: Session = Depends(get_read_db),
+):
     if table not in tables: raise HTTPException(404)
-    return db.query(tables[table]).all()
+    ensure_table(tables[table].__table__)
+    return model_listing(request, db, tables[table], shape, fields, limit, after, fmt)
 
 
 @router.post("/{table}")
@@ -1,118 +1,76 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request
 import logging
-from app.database import SessionLocal
+from app.database import get_db, get_read_db
 from app.dynamic_table import get_table_class, headers_for_sheet
-import pandas as pd
-from io import BytesIO
-from openpyxl import Workbook
-from fastapi.responses import StreamingResponse
-from typing import Generator
+from app.importer import import_sheet, duplicate_key_detail, check_mode
+from app.workbook_reader import WorkbookReader
+from app.exporter import iter_rows, write_xlsx, xlsx_response
+from app.table_versions import get_version, table_etag, etag_matches, not_modified, cache_headers
 from app.permissions import get_current_user, is_allowed, Action
 from app.models import User
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+# A plain def on purpose: parsing and loading block, so FastAPI runs the
+# whole import on its threadpool instead of the event loop. Large uploads
+# belong on /schedules/import_jobs.
 @router.post("/import/{sheet_type}/{mm}/{yy}")
-async def import_table(sheet_type: str, mm: str, yy: str, file: UploadFile = File(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def import_table(sheet_type: str, mm: str, yy: str, file: UploadFile = File(...), mode: str = "append", db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     if not is_allowed(current_user, Action.IMPORT, sheet_type):
         raise HTTPException(status_code=403, detail="Not authorized to import")
+    check_mode(mode, db.get_bind())
     
     mm = mm.zfill(2)
     yy = yy[-2:]
     table_name = f"{sheet_type.lower()}_{mm}_{yy}"
 
-    # read workbook into pandas
-    try:
-        df = pd.read_excel(file.file, engine="openpyxl", dtype=object)
-    except Exception:
-        logging.exception("Failed to parse uploaded Excel file")
-        raise HTTPException(status_code=400, detail="could not process uploaded Excel file")
+    # stream the workbook in one pass
+    reader = WorkbookReader(file.file)
 
     # expected headers must match exactly
     expected = headers_for_sheet(sheet_type.lower())
-    actual = list(df.columns)
+    actual = reader.headers
     if actual != expected:
+        reader.close()
         raise HTTPException(status_code=400, detail=f"Header mismatch. Expected EXACT headers: {expected}. Got: {actual}")
 
     Model = get_table_class(table_name, sheet_type.lower())
     tbl = Model.__table__
 
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
-    objs = []
-    for rec in records:
-        kwargs = {}
-        for col in tbl.columns:
-            if col.name == "id":
-                continue
-            kwargs[col.key] = rec.get(col.name)
-        objs.append(Model(**kwargs))
-    mm = mm.zfill(2)
-    yy = yy[-2:]
-    table_name = f"{sheet_type.lower()}_{mm}_{yy}"
+    cols = [c for c in tbl.columns if c.name != "id"]
 
-    # read workbook into pandas
     try:
-        df = pd.read_excel(file.file, engine="openpyxl", dtype=object)
-    except Exception:
-        logging.exception("Failed to parse uploaded Excel file")
-        raise HTTPException(status_code=400, detail="could not process uploaded Excel file")
-
-    # expected headers must match exactly
-    expected = headers_for_sheet(sheet_type.lower())
-    actual = list(df.columns)
-    if actual != expected:
-        raise HTTPException(status_code=400, detail=f"Header mismatch. Expected EXACT headers: {expected}. Got: {actual}")
-
-    Model = get_table_class(table_name, sheet_type.lower())
-    tbl = Model.__table__
-
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
-    objs = []
-    for rec in records:
-        kwargs = {}
-        for col in tbl.columns:
-            if col.name == "id":
-                continue
-            kwargs[col.key] = rec.get(col.name)
-        objs.append(Model(**kwargs))
-
-    db.add_all(objs)
-    db.commit()
-    return {"imported": len(objs), "table": table_name}
+        stats, failures = import_sheet(db, tbl, cols, reader, mode)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=duplicate_key_detail(mode))
+    finally:
+        reader.close()
+    imported = stats["inserted"] + stats.get("updated", 0)
+    logger.info(
+        "imported %s rows into %s", imported, table_name,
+        extra={"table": table_name, "mode": mode, "rows": imported, "elapsed_ms": round(stats["elapsed_sec"] * 1000, 1), "rows_per_sec": stats["rows_per_sec"]},
+    )
+    return {"imported": imported, "table": table_name, "mode": mode, **stats, "coercion_failures": failures}
 
 @router.get("/export/{sheet_type}/{mm}/{yy}")
-def export_table(sheet_type: str, mm: str, yy: str, db = Depends(get_db)):
+def export_table(sheet_type: str, mm: str, yy: str, request: Request, db = Depends(get_read_db)):
     mm = mm.zfill(2)
     yy = yy[-2:]
     table_name = f"{sheet_type.lower()}_{mm}_{yy}"
+
+    etag = table_etag(table_name, get_version(db, table_name), "xlsx-plain")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     Model = get_table_class(table_name, sheet_type.lower())
     tbl = Model.__table__
     cols = [c for c in tbl.columns if c.name != "id"]
 
-    rows = db.query(Model).all()
-
-    wb = Workbook()
-    ws = wb.active
-    header_row = [c.name for c in cols]
-    ws.append(header_row)
-
-    for r in rows:
-        row_values = []
-        for c in cols:
-            val = getattr(r, c.key)
-            row_values.append(val)
-        ws.append(row_values)
-
-    stream = BytesIO()
-    wb.save(stream)
-    stream.seek(0)
+    rows = iter_rows(db, tbl, cols)
+    path = write_xlsx(table_name, [c.name for c in cols], rows)
     filename = f"{table_name}.xlsx"
-    return StreamingResponse(stream, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    return xlsx_response(path, filename, cache_headers(etag))
@@ -0,0 +1,210 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.dynamic_table import get_table_class, get_table_columns
+from app.importer import import_sheet, duplicate_key_detail, check_mode
+from app.schedules import infer_sheet_type
+from app.interchange import check_format, open_reader
+from app.permissions import get_current_user, is_allowed, Action
+from app.models import User, UserType
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Imports run on a small dedicated pool so big workbooks never hold a
+# request thread. Parsing is pure-Python openpyxl / csv and holds the GIL, so
+# jobs mostly overlap on DB round trips; the pool stays small to keep one
+# import from starving the request threads.
+_executor = ThreadPoolExecutor(max_workers=settings.IMPORT_JOB_WORKERS, thread_name_prefix="import-job")
+
+# job_id -> job dict (see _new_job); guarded by _jobs_lock
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+ACTIVE_PHASES = ("queued", "parsing", "loading")
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def _new_job(table_name: str, mode: str, fmt: str, filename: str, path: str, owner: str) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "table_name": table_name,
+        "mode": mode,
+        "format": fmt,
+        "filename": filename,
+        "owner": owner,
+        "phase": "queued",
+        "rows_total": None,
+        "rows_processed": 0,
+        "rows_per_sec": None,
+        "rows_kept": None,
+        "errors": [],
+        "coercion_failures": [],
+        "result": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "_path": path,
+        "_cancel": threading.Event(),
+        "_future": None,
+    }
+
+
+def _public(job: dict) -> dict:
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+def _update(job: dict, **fields):
+    with _jobs_lock:
+        job.update(fields)
+
+
+def _prune_finished():
+    cutoff = time.time() - settings.IMPORT_JOB_RETENTION
+    with _jobs_lock:
+        for job_id in [j["id"] for j in _jobs.values() if j["finished_at"] and j["finished_at"] < cutoff]:
+            del _jobs[job_id]
+
+
+def _run_job(job: dict, batch_size: Optional[int]):
+    _update(job, phase="parsing", started_at=time.time())
+    db = SessionLocal()
+    try:
+        table_name = job["table_name"]
+        sheet_type = infer_sheet_type(table_name)
+        Model = get_table_class(table_name, sheet_type)
+        cols = get_table_columns(table_name, sheet_type)
+
+        with open(job["_path"], "rb") as f:
+            reader = open_reader(job["format"], f, [c.name for c in cols])
+            try:
+                if job["_cancel"].is_set():
+                    raise ImportCancelled()
+
+                # rows are parsed, coerced and written chunk by chunk from here on
+                _update(job, phase="loading", rows_total=reader.rows_estimate)
+                started = time.perf_counter()
+
+                def on_batch(done: int):
+                    elapsed = time.perf_counter() - started
+                    _update(job, rows_processed=done, rows_per_sec=round(done / elapsed, 1) if elapsed > 0 else None)
+                    if job["_cancel"].is_set():
+                        raise ImportCancelled()
+
+                stats, failures = import_sheet(db, Model.__table__, cols, reader, job["mode"], batch_size, on_batch)
+            finally:
+                reader.close()
+        _update(job, phase="done", result=stats, coercion_failures=failures, rows_per_sec=stats["rows_per_sec"])
+        logger.info(
+            "import job %s done", job["id"],
+            extra={"job_id": job["id"], "table": table_name, "mode": job["mode"], "elapsed_ms": round(stats["elapsed_sec"] * 1000, 1), "rows_per_sec": stats["rows_per_sec"]},
+        )
+    except ImportCancelled:
+        db.rollback()
+        # append / upsert commit per batch, so what was loaded before the
+        # cancel stays in the table; replace rolls back as a whole
+        with _jobs_lock:
+            job.update(phase="cancelled", rows_kept=0 if job["mode"] == "replace" else job["rows_processed"])
+    except HTTPException as e:
+        db.rollback()
+        _update(job, phase="failed", errors=[e.detail])
+    except IntegrityError:
+        db.rollback()
+        _update(job, phase="failed", errors=[duplicate_key_detail(job["mode"])])
+    except Exception as e:
+        logger.exception("Import job %s failed", job["id"], extra={"job_id": job["id"], "table": job["table_name"]})
+        db.rollback()
+        _update(job, phase="failed", errors=[str(e)])
+    finally:
+        db.close()
+        _update(job, finished_at=time.time())
+        try:
+            os.remove(job["_path"])
+        except OSError:
+            pass
+
+
+def _get_job(job_id: str, current_user: User) -> dict:
+    """A job of `current_user`; superusers see every job"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if not is_allowed(current_user, Action.IMPORT, job["table_name"]):
+        raise HTTPException(status_code=403, detail="Not authorized to view this import")
+    if job["owner"] != current_user.email and current_user.user_type != UserType.SUPERUSER:
+        raise HTTPException(status_code=403, detail="Not authorized to view this import")
+    return job
+
+
+@router.post("/import_jobs/{table_name}", status_code=202)
+def start_import_job(
+    table_name: str,
+    file: UploadFile = File(...),
+    mode: str = "append",
+    batch_size: Optional[int] = Query(None, ge=1, le=settings.IMPORT_BATCH_SIZE_MAX),
+    fmt: str = Query("xlsx", alias="format"),
+    current_user: User = Depends(get_current_user),
+):
+    if not is_allowed(current_user, Action.IMPORT, table_name):
+        raise HTTPException(status_code=403, detail="Not authorized to import")
+    check_mode(mode, engine)
+    check_format(fmt)
+
+    _prune_finished()
+    with _jobs_lock:
+        pending = sum(1 for j in _jobs.values() if j["phase"] in ACTIVE_PHASES)
+    if pending >= settings.IMPORT_JOB_MAX_PENDING:
+        raise HTTPException(status_code=429, detail="Too many imports in progress, try again later")
+
+    # spool the upload so the request can return right away
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", dir=settings.IMPORT_SPOOL_DIR or None)
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+    job = _new_job(table_name, mode, fmt, file.filename, path, current_user.email)
+    with _jobs_lock:
+        _jobs[job["id"]] = job
+    job["_future"] = _executor.submit(_run_job, job, batch_size)
+
+    return {"job_id": job["id"], "status_url": f"/schedules/import_jobs/{job['id']}"}
+
+
+@router.get("/import_jobs/{job_id}")
+def get_import_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = _get_job(job_id, current_user)
+    with _jobs_lock:
+        return _public(job)
+
+
+@router.delete("/import_jobs/{job_id}")
+def cancel_import_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = _get_job(job_id, current_user)
+    with _jobs_lock:
+        if job["phase"] not in ACTIVE_PHASES:
+            raise HTTPException(status_code=409, detail=f"Import job already {job['phase']}")
+
+        job["_cancel"].set()
+        # a job still waiting for a worker never starts
+        if job["_future"] is not None and job["_future"].cancel():
+            os.remove(job["_path"])
+            job.update(phase="cancelled", rows_kept=0, finished_at=time.time())
+        phase = job["phase"]
+
+    # a running append / upsert stops after its current batch; the job's
+    # rows_kept then says how many rows it had already committed
+    return {"cancelled": True, "phase": phase}
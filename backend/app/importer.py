@@ -0,0 +1,271 @@
+from sqlalchemy import insert, select, delete, func, Numeric
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.config import settings
+from app.coercion import coerce_frame
+from app import metrics
+from app.table_versions import bump_version
+from app.dynamic_table import invalidate_table
+from app.search_index import reindex_table, index_new_rows, index_rows, INDEXED_COLUMNS
+import time
+
+IMPORT_MODES = ("append", "upsert", "replace")
+
+# Every month table has a unique index on this column (see dynamic_table)
+UPSERT_KEY = "EPICOR NO"
+
+# dialects with a native INSERT ... ON DUPLICATE KEY / ON CONFLICT (see _upsert_statement)
+UPSERT_DIALECTS = ("mysql", "sqlite")
+
+
+def check_mode(mode: str, bind) -> str:
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown import mode: {mode}")
+    if mode == "upsert" and bind.dialect.name not in UPSERT_DIALECTS:
+        raise HTTPException(status_code=400, detail=f"mode=upsert is not supported on {bind.dialect.name}")
+    return mode
+
+
+def duplicate_key_detail(mode: str) -> str:
+    """409 detail for an IntegrityError on the EPICOR NO unique index"""
+    if mode == "append":
+        return "Duplicate EPICOR NO in table; re-import with mode=upsert or mode=replace"
+    if mode == "replace":
+        return "Duplicate EPICOR NO within the sheet; re-import with mode=upsert to keep the last row per key"
+    return "Import conflicts with a unique index of the table"
+
+
+def null_blank_keys(table, records):
+    """Store NULL instead of "NA" for rows without an EPICOR NO.
+
+    The unique index lets any number of NULLs in, but only one "NA".
+    """
+    key_col = next((c for c in table.columns if c.name == UPSERT_KEY), None)
+    if key_col is None:
+        return records
+    for rec in records:
+        if rec.get(key_col.key) == "NA":
+            rec[key_col.key] = None
+    return records
+
+
+def chunked(records, size: int):
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+def _timed_stats(stats: dict, rows: int, started: float) -> dict:
+    elapsed = time.perf_counter() - started
+    stats["elapsed_sec"] = round(elapsed, 3)
+    stats["rows_per_sec"] = round(rows / elapsed, 1) if elapsed > 0 else None
+    return stats
+
+
+def insert_rows(db: Session, table, records, batch_size: int = None, commit: bool = True, on_batch=None) -> dict:
+    """Bulk insert already-coerced rows with Core executemany.
+
+    `records` are dicts keyed by column key. Each batch is one executemany
+    (PyMySQL rewrites it into a multi-row INSERT ... VALUES) and is committed
+    on its own, so a failure only rolls back the current batch. With
+    commit=False the caller owns the transaction. `on_batch(rows_done)` is
+    called after every batch and may raise to stop the load.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    stmt = insert(table)
+
+    started = time.perf_counter()
+    inserted = 0
+    for batch in chunked(records, batch_size):
+        db.execute(stmt, batch)
+        if commit:
+            db.commit()
+        inserted += len(batch)
+        if on_batch:
+            on_batch(inserted)
+
+    stats = {"inserted": inserted, "batches": -(-inserted // batch_size)}
+    return _timed_stats(stats, inserted, started)
+
+
+def _upsert_statement(db: Session, table, key_col):
+    update_cols = [c for c in table.columns if c.name not in ("id", key_col.name)]
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c.key] for c in update_cols})
+    if dialect == "sqlite":
+        stmt = sqlite.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=[key_col],
+            set_={c: stmt.excluded[c.key] for c in update_cols},
+        )
+    # check_mode rejects these before a load starts
+    raise ValueError(f"upsert is not supported on {dialect}")
+
+
+def _same_value(col, old, new) -> bool:
+    if old is None or new is None:
+        return old is None and new is None
+    if isinstance(col.type, Numeric):
+        return round(float(old), col.type.scale or 0) == round(float(new), col.type.scale or 0)
+    return old == new
+
+
+def upsert_rows(db: Session, table, records, batch_size: int = None, on_batch=None) -> dict:
+    """Insert new rows and update changed ones, matched on EPICOR NO.
+
+    Each batch first reads the existing rows for its keys, so rows whose
+    values are identical are skipped entirely and the counts are exact;
+    only new and changed rows go through INSERT ... ON DUPLICATE KEY UPDATE
+    (ON CONFLICT DO UPDATE on SQLite). Rows without a key are appended
+    with a NULL key. Updated rows whose OA / customer changed are
+    re-indexed in their batch; new rows are left to the caller.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    key_col = next(c for c in table.columns if c.name == UPSERT_KEY)
+    data_cols = [c for c in table.columns if c.name != "id"]
+    indexed_cols = [c for c in data_cols if c.name in INDEXED_COLUMNS]
+    upsert = _upsert_statement(db, table, key_col)
+
+    started = time.perf_counter()
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "duplicate_keys": 0, "batches": 0}
+
+    # later rows of the sheet win over earlier ones with the same key
+    keyed = {}
+    keyless = []
+    for rec in null_blank_keys(table, records):
+        key = rec.get(key_col.key)
+        if key is None:
+            keyless.append(rec)
+            continue
+        if key in keyed:
+            stats["duplicate_keys"] += 1
+        keyed[key] = rec
+
+    done = len(records) - len(keyed) - len(keyless)
+    for batch in chunked(list(keyed.values()), batch_size):
+        keys = [rec[key_col.key] for rec in batch]
+        existing = {
+            row[key_col.key]: row
+            for row in db.execute(select(table.c.id, *data_cols).where(key_col.in_(keys))).mappings()
+        }
+
+        changed = []
+        reindex = []
+        for rec in batch:
+            old = existing.get(rec[key_col.key])
+            if old is None:
+                stats["inserted"] += 1
+            elif all(_same_value(c, old[c.key], rec.get(c.key)) for c in data_cols):
+                stats["unchanged"] += 1
+                continue
+            else:
+                stats["updated"] += 1
+                if not all(_same_value(c, old[c.key], rec.get(c.key)) for c in indexed_cols):
+                    reindex.append((old["id"], {c.name: rec.get(c.key) for c in indexed_cols}))
+            changed.append(rec)
+
+        if changed:
+            db.execute(upsert, changed)
+            index_rows(db, table, reindex)
+        db.commit()
+        stats["batches"] += 1
+        done += len(batch)
+        if on_batch:
+            on_batch(done)
+
+    if keyless:
+        progress = (lambda n: on_batch(done + n)) if on_batch else None
+        appended = insert_rows(db, table, keyless, batch_size, on_batch=progress)
+        stats["inserted"] += appended["inserted"]
+        stats["batches"] += appended["batches"]
+
+    return _timed_stats(stats, len(records), started)
+
+
+def load_chunks(db: Session, table, chunks, mode: str = "append", batch_size: int = None, on_batch=None) -> dict:
+    """Write an iterable of coerced record lists using one of IMPORT_MODES.
+
+    Chunks are consumed one at a time, so a streamed sheet is never held in
+    memory as a whole. replace deletes the old rows and loads every chunk in
+    one transaction so a failed import keeps the old rows; append and upsert
+    commit per batch. New rows get ids above the table's last one, which is
+    how the search index picks them up afterwards.
+    """
+    started = time.perf_counter()
+    replace = mode == "replace"
+    totals = {"inserted": 0, "batches": 0}
+    rows = 0
+    last_id = None
+    try:
+        if replace:
+            totals["deleted"] = db.execute(delete(table)).rowcount
+        else:
+            last_id = db.execute(select(func.max(table.c.id))).scalar() or 0
+
+        for records in chunks:
+            progress = (lambda n, offset=rows: on_batch(offset + n)) if on_batch else None
+            if mode == "upsert":
+                stats = upsert_rows(db, table, records, batch_size, progress)
+            else:
+                stats = insert_rows(db, table, null_blank_keys(table, records), batch_size, commit=not replace, on_batch=progress)
+            rows += len(records)
+            for key in ("inserted", "updated", "unchanged", "duplicate_keys", "batches"):
+                if key in stats:
+                    totals[key] = totals.get(key, 0) + stats[key]
+
+        # replace commits its whole load here, append / upsert just the
+        # search index entries of the new rows and the version bump; a load
+        # that changed nothing keeps the table's ETag
+        if replace and (totals["inserted"] or totals["deleted"]):
+            reindex_table(db, table, batch_size)
+        elif not replace and totals["inserted"]:
+            index_new_rows(db, table, last_id, batch_size)
+        if totals["inserted"] + totals.get("updated", 0) + totals.get("deleted", 0):
+            bump_version(db, table.name)
+        db.commit()
+        if replace:
+            # the table was rewritten as a whole; re-check its schema on next use
+            invalidate_table(table.name)
+    except Exception:
+        db.rollback()
+        if last_id is not None:
+            # batches committed before the failure did change the table
+            try:
+                index_new_rows(db, table, last_id, batch_size)
+                bump_version(db, table.name)
+                db.commit()
+            except Exception:
+                db.rollback()
+        raise
+
+    totals = _timed_stats(totals, rows, started)
+    metrics.observe_rows("import", rows, totals["elapsed_sec"])
+    return totals
+
+
+def load_records(db: Session, table, records, mode: str = "append", batch_size: int = None, on_batch=None) -> dict:
+    """Write one list of coerced records into a month table"""
+    return load_chunks(db, table, [records], mode, batch_size, on_batch)
+
+
+def import_sheet(db: Session, table, cols, reader, mode: str = "append", batch_size: int = None, on_batch=None):
+    """Coerce and load a WorkbookReader chunk by chunk.
+
+    Returns (load stats, coercion failures merged over all chunks).
+    """
+    failures = {}
+
+    def coerced_chunks():
+        for df in reader.chunks():
+            records, chunk_failures = coerce_frame(df, cols)
+            for f in chunk_failures:
+                merged = failures.setdefault(f["column"], {"column": f["column"], "failed": 0, "samples": []})
+                merged["failed"] += f["failed"]
+                merged["samples"] = (merged["samples"] + f["samples"])[:3]
+            yield records
+
+    stats = load_chunks(db, table, coerced_chunks(), mode, batch_size, on_batch)
+    return stats, list(failures.values())
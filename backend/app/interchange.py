@@ -0,0 +1,243 @@
+import csv
+import io
+import os
+import tempfile
+
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import Integer, Numeric, Date, Text
+from starlette.background import BackgroundTask
+
+from app.config import settings
+from app.dynamic_table import _col_type_for_header
+from app.workbook_reader import WorkbookReader
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet / arrow formats answer 400 without it
+    pa = None
+
+# Machine-to-machine formats next to the planners' xlsx. Readers expose the
+# same interface as WorkbookReader (headers, header_row, rows_estimate,
+# chunks(), close()) so importer.import_sheet takes any of them.
+
+FORMATS = ("xlsx", "csv", "parquet", "arrow")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {fmt}, expected one of {', '.join(FORMATS)}")
+    if fmt in ("parquet", "arrow") and pa is None:
+        raise HTTPException(status_code=400, detail=f"{fmt} support needs pyarrow installed on the server")
+    return fmt
+
+
+def _missing_columns(headers, required_columns):
+    missing = set(required_columns) - set(headers)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {missing}")
+
+# ===== ARROW TYPES =====
+
+def arrow_type(header: str, sheet_type: str):
+    """Arrow type of a month-table column, from the same typing as the table DDL"""
+    t = _col_type_for_header(header, sheet_type)
+    if t is Integer:
+        return pa.int64()
+    if isinstance(t, Numeric):
+        return pa.decimal128(t.precision, t.scale)
+    if t is Date:
+        return pa.date32()
+    if t is Text:
+        return pa.large_string()
+    return pa.string()
+
+
+def arrow_schema(headers, sheet_type: str):
+    return pa.schema([pa.field(h, arrow_type(h, sheet_type)) for h in headers])
+
+# ===== EXPORT =====
+
+def csv_response(headers, rows, filename: str, extra_headers: dict = None, on_close=None) -> StreamingResponse:
+    """Stream rows as CSV, flushing every EXPORT_CHUNK_SIZE rows; nothing is spooled to disk.
+
+    `on_close` runs once the stream ends (or the client goes away), e.g. to
+    close the session `rows` is read from.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+
+    def generate():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        try:
+            writer.writerow(headers)
+            for n, row in enumerate(rows, start=1):
+                writer.writerow(row)
+                if n % chunk_size == 0:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+            yield buf.getvalue()
+        finally:
+            if on_close:
+                on_close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES["csv"],
+        headers={**(extra_headers or {}), "Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def write_arrow(fmt: str, headers, rows, sheet_type: str) -> str:
+    """Write rows to a temporary .parquet / .arrow file in record batches, return its path"""
+    schema = arrow_schema(headers, sheet_type)
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+
+    def batches():
+        buf = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= settings.EXPORT_CHUNK_SIZE:
+                yield _record_batch(buf, schema)
+                buf = []
+        if buf:
+            yield _record_batch(buf, schema)
+
+    try:
+        if fmt == "parquet":
+            with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+                for batch in batches():
+                    writer.write_batch(batch)
+        else:
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches():
+                    writer.write_batch(batch)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def _record_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def file_response(fmt: str, path: str, filename: str, headers: dict = None) -> FileResponse:
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[fmt],
+        filename=filename,
+        headers=headers,
+        background=BackgroundTask(os.remove, path),
+    )
+
+# ===== IMPORT =====
+
+class CsvReader:
+    """Chunked CSV reader; first line is the header row"""
+
+    header_row = 0
+    rows_estimate = None
+
+    def __init__(self, fileobj, required_columns=(), chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.IMPORT_READ_CHUNK
+        try:
+            self._reader = pd.read_csv(
+                fileobj,
+                dtype=str,
+                keep_default_na=False,
+                chunksize=self.chunk_size,
+                encoding="utf-8-sig",
+            )
+            self._first = next(self._reader, None)
+        except Exception:
+            raise HTTPException(status_code=400, detail="could not process uploaded CSV file")
+        if self._first is None:
+            raise HTTPException(status_code=400, detail="CSV file has no header row")
+        self.headers = [h.strip() for h in self._first.columns]
+        _missing_columns(self.headers, required_columns)
+
+    def chunks(self):
+        try:
+            chunk = self._first
+            while chunk is not None:
+                chunk.columns = self.headers
+                blank = chunk.apply(lambda col: col.str.strip() == "").all(axis=1)
+                # an empty CSV field is an empty cell, as in the xlsx import
+                chunk = chunk[~blank].astype(object)
+                chunk = chunk.mask(chunk == "", None)
+                if len(chunk):
+                    yield chunk
+                chunk = next(self._reader, None) if self._reader is not None else None
+        finally:
+            self.close()
+
+    def close(self):
+        # safe to call twice: chunks() closes too, possibly only at GC time
+        # after the upload's file was already closed under the text wrapper
+        if self._reader is None:
+            return
+        reader, self._reader = self._reader, None
+        try:
+            reader.close()
+        except ValueError:
+            pass
+
+
+class ArrowReader:
+    """Parquet or Arrow IPC reader; typed dates / decimals arrive as date / Decimal objects"""
+
+    header_row = 0
+
+    def __init__(self, fileobj, fmt: str, required_columns=(), chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.IMPORT_READ_CHUNK
+        try:
+            if fmt == "parquet":
+                self._file = pq.ParquetFile(fileobj)
+                self.headers = list(self._file.schema_arrow.names)
+                self.rows_estimate = self._file.metadata.num_rows
+            else:
+                self._file = pa.ipc.open_file(fileobj)
+                self.headers = list(self._file.schema.names)
+                self.rows_estimate = None
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"could not process uploaded {fmt} file")
+        _missing_columns(self.headers, required_columns)
+
+    def _batches(self):
+        if isinstance(self._file, pq.ParquetFile):
+            yield from self._file.iter_batches(batch_size=self.chunk_size)
+        else:
+            for i in range(self._file.num_record_batches):
+                yield self._file.get_batch(i)
+
+    def chunks(self):
+        for batch in self._batches():
+            # object columns keep date / Decimal values for coerce_frame
+            yield pd.DataFrame({name: batch.column(i).to_pylist() for i, name in enumerate(self.headers)}, dtype=object)
+
+    def close(self):
+        pass
+
+
+def open_reader(fmt: str, fileobj, required_columns=()):
+    """Reader for an uploaded file in any of FORMATS"""
+    if fmt == "csv":
+        return CsvReader(fileobj, required_columns)
+    if fmt in ("parquet", "arrow"):
+        return ArrowReader(fileobj, fmt, required_columns)
+    return WorkbookReader(fileobj, required_columns)
@@ -0,0 +1,100 @@
+import atexit
+import copy
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+from app.config import settings
+
+# Set per request by RequestContextMiddleware; copied into run_in_threadpool
+# workers automatically, so route code never passes it around.
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "request_id":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that stamps the request id while still on the calling thread"""
+
+    def prepare(self, record):
+        # like QueueHandler.prepare, but keeps the traceback apart from the message
+        record = copy.copy(record)
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Route all logging through a queue; file / stderr writes happen on the listener thread.
+
+    Levels come from settings: LOG_LEVEL for the root logger, LOG_LEVELS for
+    per-module overrides such as {"app.schedules": "DEBUG"}.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter()
+    handlers = []
+    if settings.LOG_FILE:
+        handlers.append(logging.FileHandler(settings.LOG_FILE))
+    if settings.LOG_STDERR:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_ContextQueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in settings.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush whatever is still queued; safe to call more than once"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,17 +1,21 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 import logging
 
-from app import auth, schedules, import_export
+from app import auth, schedules, import_export, import_jobs, group_a, shutdown_job, metrics
 from app.config import settings
+from app.middleware import MaxUploadSizeMiddleware, FreezeWritesMiddleware, RequestContextMiddleware, MetricsMiddleware, PrimaryPinMiddleware
+from app.logging_config import setup_logging
+from app.permissions import get_current_user
 
 
 app = FastAPI(title="Scheduling App API - Dynamic Tables")
 
-# configure logging
-logging.basicConfig(filename=settings.LOG_FILE, level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+# JSON lines through a background listener, levels from settings
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # CORS: restrict to configured origins
 app.add_middleware(
@@ -19,47 +23,34 @@ app.add_middleware(
     allow_origins=settings.ALLOWED_ORIGINS or [],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID", "X-Next-Cursor"],
 )
 
 
-class MaxUploadSizeMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_size: int):
-        super().__init__(app)
-        self.max_size = max_size
-
-    async def dispatch(self, request: Request, call_next):
-        content_length = request.headers.get("content-length")
-        if content_length:
-            try:
-                if int(content_length) > self.max_size:
-                    return JSONResponse({"detail": "Request body too large"}, status_code=413)
-            except ValueError:
-                pass
-        return await call_next(request)
-
-
-class FreezeWritesMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, allow_write: bool):
-        super().__init__(app)
-        self.allow_write = allow_write
-
-    async def dispatch(self, request: Request, call_next):
-        if not self.allow_write and request.method in ("POST", "PUT", "PATCH", "DELETE"):
-            return JSONResponse({"detail": "Modifications temporarily disabled for security review"}, status_code=403)
-        return await call_next(request)
-
-
 # Add middlewares
 app.add_middleware(MaxUploadSizeMiddleware, max_size=settings.MAX_UPLOAD_SIZE)
 app.add_middleware(FreezeWritesMiddleware, allow_write=settings.ALLOW_WRITE)
+app.add_middleware(PrimaryPinMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
-    logging.exception("Unhandled exception: %s", exc)
+    logger.exception("Unhandled exception: %s", exc)
     return JSONResponse({"detail": "Internal server error"}, status_code=500)
 
 
 app.include_router(auth.router, prefix="/auth")
 app.include_router(schedules.router, prefix="/schedules")
+app.include_router(import_jobs.router, prefix="/schedules")
 app.include_router(import_export.router, prefix="/files")
+# static order tables, read-only listings; these routers have no auth of their own
+app.include_router(group_a.listing_router, prefix="/group_a", dependencies=[Depends(get_current_user)])
+app.include_router(shutdown_job.listing_router, prefix="/shutdown_jobs", dependencies=[Depends(get_current_user)])
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of the in-process counters in app.metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,205 @@
+import bisect
+import contextvars
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# In-process metrics rendered in the Prometheus text format by GET /metrics.
+# Every update is a dict lookup plus a few additions under a lock, cheap
+# enough for the request path; nothing is exported unless scraped.
+
+# seconds; covers fast JSON pages up to multi-minute imports / exports
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+_registry = []
+
+# query counter of the request being handled, set by MetricsMiddleware
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            if isinstance(value, float):
+                value = round(value, 6)
+            yield f"{self.name}{_label_str(self.labels, key)} {value}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, doc: str, labels=(), func=None):
+        super().__init__(name, doc, labels)
+        self._func = func  # read at scrape time instead of being set
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels):
+        self.inc(-amount, *labels)
+
+    def render(self):
+        if self._func is not None:
+            value = self._func()
+            if value is None:
+                return
+            self.set(value)
+        yield from super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][idx] += 1
+            state[1] += 1
+            state[2] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()]
+        names = self.labels + ("le",)
+        for key, (counts, count, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_label_str(names, key + (bound,))} {cumulative}"
+            yield f"{self.name}_count{_label_str(self.labels, key)} {count}"
+            yield f"{self.name}_sum{_label_str(self.labels, key)} {round(total, 6)}"
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===== HTTP =====
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route template", ("method", "route"))
+REQUESTS = Counter("http_requests_total", "Finished requests", ("method", "route", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled right now")
+QUERIES_PER_REQUEST = Histogram("db_queries_per_request", "SQL statements executed per request", ("route",), QUERY_BUCKETS)
+QUERIES = Counter("db_queries_total", "SQL statements executed")
+
+
+def route_label(scope) -> str:
+    """Route template of a handled request, e.g. /schedules/rows/{table_name}.
+
+    Routes of an included router only know their own template, so the
+    router prefix is the part of the request path in front of where the
+    route's regex matches; unmatched paths share one label to keep the
+    series count bounded.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", None)
+    regex = getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        return scope["path"]
+    path = scope["path"]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+
+def start_request_queries():
+    """Start counting statements for this request; returns (holder, reset token)"""
+    holder = [0]
+    return holder, _request_queries.set(holder)
+
+
+def end_request_queries(token):
+    _request_queries.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    QUERIES.inc()
+    holder = _request_queries.get()
+    if holder is not None:
+        holder[0] += 1
+
+
+# ===== DB POOL =====
+
+def _pool_stat(method: str):
+    def read():
+        from app.database import engine
+        fn = getattr(engine.pool, method, None)
+        return fn() if callable(fn) else None
+    return read
+
+
+Gauge("db_pool_size", "Configured pool size", func=_pool_stat("size"))
+Gauge("db_pool_checked_out", "Connections currently checked out", func=_pool_stat("checkedout"))
+Gauge("db_pool_overflow", "Connections open beyond pool_size", func=lambda: max(_pool_stat("overflow")() or 0, 0))
+
+
+# ===== IMPORT / EXPORT =====
+
+ROWS = Counter("rows_processed_total", "Rows imported or exported", ("direction",))
+ROWS_SECONDS = Counter("rows_processing_seconds_total", "Time spent importing or exporting rows", ("direction",))
+ROWS_PER_SEC = Gauge("rows_per_second_last", "Throughput of the most recent import or export", ("direction",))
+XLSX_SECONDS = Histogram("xlsx_generation_seconds", "Time to build an export workbook, including the row fetch")
+
+
+def observe_rows(direction: str, rows: int, elapsed: float):
+    """Record one finished import ("import") or export ("export")"""
+    ROWS.inc(rows, direction)
+    ROWS_SECONDS.inc(elapsed, direction)
+    if elapsed > 0:
+        ROWS_PER_SEC.set(round(rows / elapsed, 1), direction)
+
@@ -0,0 +1,203 @@
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+import logging
+import time
+import uuid
+
+from app.logging_config import request_id_var
+from app import metrics, database
+
+# Plain ASGI middlewares: no per-request task or response stream wrapping
+# like BaseHTTPMiddleware, so streaming exports pass straight through.
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+access_logger = logging.getLogger("app.access")
+
+
+class BodyTooLarge(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=413, detail="Request body too large")
+
+
+class MaxUploadSizeMiddleware:
+    """Reject request bodies above max_size bytes.
+
+    A declared content-length over the limit is refused before the app runs.
+    Bodies are also counted as they are received, so chunked uploads (or a
+    lying content-length) stop at the limit instead of being buffered whole.
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    if int(value) > self.max_size:
+                        return await self._too_large(scope, receive, send)
+                except ValueError:
+                    pass
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise BodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge:
+            # normally FastAPI turns it into a 413 itself; this covers bodies
+            # read outside a route
+            if response_started:
+                raise
+            await self._too_large(scope, receive, send)
+
+    async def _too_large(self, scope, receive, send):
+        response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+        await response(scope, receive, send)
+
+
+class FreezeWritesMiddleware:
+    """Answer 403 to every write method while writes are frozen, before any body is read"""
+
+    def __init__(self, app, allow_write: bool):
+        self.app = app
+        self.allow_write = allow_write
+
+    async def __call__(self, scope, receive, send):
+        if not self.allow_write and scope["type"] == "http" and scope["method"] in WRITE_METHODS:
+            response = JSONResponse({"detail": "Modifications temporarily disabled for security review"}, status_code=403)
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+class RequestContextMiddleware:
+    """Give every request an id (incoming X-Request-ID or a new one) and log it with its timing.
+
+    The id is put in request_id_var, so every log line written while handling
+    the request carries it, and is echoed back in the X-Request-ID header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            access_logger.info(
+                "%s %s %s", scope["method"], scope["path"], status,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
+
+
+class MetricsMiddleware:
+    """Feed request latency, in-flight count and per-request query count into app.metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries, token = metrics.start_request_queries()
+        metrics.IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.IN_FLIGHT.dec()
+            metrics.end_request_queries(token)
+            route = metrics.route_label(scope)
+            metrics.REQUEST_LATENCY.observe(elapsed, scope["method"], route)
+            metrics.REQUESTS.inc(1, scope["method"], route, status)
+            metrics.QUERIES_PER_REQUEST.observe(queries[0], route)
+
+
+class PrimaryPinMiddleware:
+    """Read-after-write consistency for replica reads.
+
+    A client (keyed by its Authorization header, else its address) whose
+    request committed anything has its reads served by the primary for
+    READ_AFTER_WRITE_SECONDS, so it never reads a replica that lacks its change.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not database.replica_engines:
+            return await self.app(scope, receive, send)
+
+        auth = next((v for k, v in scope["headers"] if k == b"authorization"), None)
+        if auth is None and scope.get("client"):
+            auth = scope["client"][0].encode()
+        key = database.client_key(auth or b"")
+
+        pin_token = database.pin_to_primary(key)
+        commits, commit_token = database.track_commits()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            database.end_commit_tracking(commit_token)
+            database.unpin(pin_token)
+            if commits[0]:
+                database.note_write(key)
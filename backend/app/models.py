@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, Text, UniqueConstraint, Enum as SQLEnum
 from app.database import Base
 import enum
 
@@ -15,6 +15,35 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     user_type = Column(SQLEnum(UserType), nullable=False)
 
+class OrderIndex(Base):
+    """Where each order lives across the month tables, for /schedules/search"""
+    __tablename__ = "order_index"
+    __table_args__ = (UniqueConstraint("table_name", "row_id"),)
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    epicor_no = Column(String(255), index=True)
+    oa = Column(String(255), index=True)
+    customer_key = Column(String(255), index=True)  # normalize_customer(CUSTOMER NAME)
+    customer_name = Column(String(255))
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)  # month table, e.g. group_a_03_25
+    version = Column(Integer, nullable=False, default=0)  # bumped on every write, drives the ETag
+    updated_at = Column(DateTime, nullable=False)
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, nullable=False)  # sha256 hex, the token itself is never stored
+    user_email = Column(String(255), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, nullable=False, default=False)
+
 # GROUP A
 class GroupABase(Base):
     __abstract__ = True
@@ -1,11 +1,15 @@
 from enum import Enum
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import get_db, get_async_read_db
 from app.models import User, UserType
 import jwt
 from app.config import settings
+from collections import OrderedDict
+import threading
+import time
 
 security = HTTPBearer()
 
@@ -17,34 +21,95 @@ class Action(str, Enum):
     IMPORT = "import"
     EXPORT = "export"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ===== RESOLVED USER CACHE =====
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+# email -> (expires_at, detached User snapshot), least recently used first
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+def _cached_user(email: str):
+    with _user_cache_lock:
+        entry = _user_cache.get(email)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _user_cache[email]
+            return None
+        _user_cache.move_to_end(email)
+        return entry[1]
+
+def _cache_user(user: User) -> User:
+    # a plain copy, so it never depends on (or gets expired by) a session
+    snapshot = User(id=user.id, email=user.email, password_hash="", user_type=user.user_type)
+    if settings.USER_CACHE_TTL <= 0:
+        return snapshot
+    with _user_cache_lock:
+        _user_cache[user.email] = (time.monotonic() + settings.USER_CACHE_TTL, snapshot)
+        _user_cache.move_to_end(user.email)
+        while len(_user_cache) > settings.USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return snapshot
+
+def invalidate_user(email: str = None):
+    """Drop a cached user (or all of them) after it was created or changed.
+
+    Other worker processes keep their copy for at most USER_CACHE_TTL.
+    """
+    with _user_cache_lock:
+        if email is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(email, None)
+
+def _token_email(credentials: HTTPAuthorizationCredentials) -> str:
     try:
         payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        # Handle dummy admin user for testing
-        if email == "admin":
-            dummy_user = User(id=0, email="admin", password_hash="", user_type=UserType.SUPERUSER)
-            return dummy_user
-        
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return email
+
+def _known_user(email: str):
+    """The dummy admin or a cached user, without touching the database"""
+    # Handle dummy admin user for testing
+    if email == "admin":
+        dummy_user = User(id=0, email="admin", password_hash="", user_type=UserType.SUPERUSER)
+        return dummy_user
+    return _cached_user(email)
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    email = _token_email(credentials)
+    user = _known_user(email)
+    if user is not None:
+        return user
+
+    # db is the primary session from get_db: write routes share it, read
+    # routes (get_read_db) get it as a second session that only connects on
+    # a cache miss. Users are looked up on the primary on purpose, so an
+    # account created a moment ago is found even if a replica lags.
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return _cache_user(user)
+
+async def get_current_user_async(credentials: HTTPAuthorizationCredentials = Depends(security), db=Depends(get_async_read_db)):
+    """get_current_user for the async read endpoints (ASYNC_DB)"""
+    email = _token_email(credentials)
+    user = _known_user(email)
+    if user is not None:
+        return user
+
+    # db is again the route's own (async) session
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    return _cache_user(user)
+
 def is_allowed(user: User, action: Action, table_name: str) -> bool:
     """
     Check if user is allowed to perform action on table_name
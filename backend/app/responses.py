@@ -0,0 +1,175 @@
+import datetime
+import decimal
+import gzip
+import json
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import read_session
+
+try:
+    import orjson
+except ImportError:  # plain json fallback, same output, just slower
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+ROW_SHAPES = ("rows", "columnar")
+LISTING_FORMATS = ("json", "ndjson")
+
+
+def _default(value):
+    # orjson handles date / datetime natively; Decimal is the common leftover
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson, skipping FastAPI's jsonable_encoder pass"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def to_columnar(rows, columns):
+    """[{col: value}] -> [[value, ...]] in `columns` order"""
+    return [[row.get(c) for c in columns] for row in rows]
+
+
+def model_columns(model, fields: str = None):
+    """Columns of a static ORM table for `?fields=OA,EPICOR_NO,EDD`; id always comes first"""
+    table = model.__table__
+    if not fields:
+        return list(table.columns)
+    cols = [table.c.id]
+    for name in (f.strip() for f in fields.split(",")):
+        if not name or name == "id":
+            continue
+        if name not in table.c:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        cols.append(table.c[name])
+    return cols
+
+
+def _model_select(model, cols, limit: int = None, after: int = None):
+    table = model.__table__
+    stmt = select(*cols).order_by(table.c.id)
+    if after is not None:
+        stmt = stmt.where(table.c.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def model_rows(db: Session, model, shape: str = "rows", fields: str = None, limit: int = None, after: int = None):
+    """Rows of a static ORM table for the listing endpoints, without building ORM objects.
+
+    "rows" is the original list of {column: value}; "columnar" returns
+    {"columns": [...], "rows": [[...], ...]}. With `limit` only that many
+    rows after id `after` are read; returns (content, next cursor or None).
+    """
+    if shape not in ROW_SHAPES:
+        raise HTTPException(status_code=400, detail=f"Unknown shape: {shape}")
+    if limit is not None:
+        limit = min(max(limit, 1), settings.MAX_PAGE_SIZE)
+    cols = model_columns(model, fields)
+    # one extra row tells whether there is a next page
+    result = db.execute(_model_select(model, cols, limit + 1 if limit else None, after))
+    keys = list(result.keys())
+    rows = result.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(rows[-1].id)
+
+    if shape == "columnar":
+        return {"columns": keys, "rows": [list(r) for r in rows]}, next_cursor
+    return [dict(r._mapping) for r in rows], next_cursor
+
+
+def ndjson_response(model, fields: str = None, limit: int = None, after: int = None) -> StreamingResponse:
+    """Stream a static ORM table as one JSON object per line.
+
+    Rows come from a server-side cursor in EXPORT_CHUNK_SIZE batches and
+    go out as they are read, so memory stays flat whatever the table size.
+    The stream has its own read session, which outlives the request's
+    dependencies; continue after the last row's id with `after`.
+    """
+    cols = model_columns(model, fields)
+    stmt = _model_select(model, cols, limit, after).execution_options(yield_per=settings.EXPORT_CHUNK_SIZE)
+    db = read_session()
+
+    def generate():
+        try:
+            for part in db.execute(stmt).mappings().partitions():
+                yield b"".join(dumps(dict(row)) + b"\n" for row in part)
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+def _pick_encoding(request: Request):
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def json_response(request: Request, content, status_code: int = 200, headers: dict = None) -> FastJSONResponse:
+    """orjson response, brotli / gzip compressed when the client accepts it and the body is big enough"""
+    response = FastJSONResponse(content, status_code=status_code, headers=headers)
+    response.headers["vary"] = "Accept-Encoding"
+    body = response.body
+    if len(body) < settings.COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = _pick_encoding(request)
+    if encoding == "br":
+        body = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+    else:
+        return response
+
+    response.body = body
+    response.headers["content-encoding"] = encoding
+    response.headers["content-length"] = str(len(body))
+    return response
+
+
+def model_listing(request: Request, db: Session, model, shape: str = "rows", fields: str = None,
+                  limit: int = None, after: int = None, fmt: str = "json"):
+    """GET handler body shared by the static-table routers (group_a, shutdown_job).
+
+    A JSON page that has more rows after it carries the next `after` value
+    in the X-Next-Cursor header.
+    """
+    if fmt not in LISTING_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {fmt}")
+    if fmt == "ndjson":
+        return ndjson_response(model, fields, limit, after)
+    content, next_cursor = model_rows(db, model, shape, fields, limit, after)
+    return json_response(request, content, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
@@ -0,0 +1,164 @@
+import re
+
+from sqlalchemy import select, delete, insert, inspect, or_, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import ensure_table
+from app.models import OrderIndex
+
+# Global EPICOR NO / OA / customer lookup over every month table. Row writes
+# update their entries in the same transaction; imports index the rows they
+# inserted or changed, and replace re-indexes the whole month table (see
+# importer.load_chunks).
+
+MONTH_TABLE = re.compile(r"^[a-z_]+_\d{2}_\d{2}$")
+SEARCH_FIELDS = ("any", "epicor", "oa", "customer")
+INDEXED_COLUMNS = ("EPICOR NO", "OA", "CUSTOMER NAME")
+
+_index = OrderIndex.__table__
+
+
+def normalize_customer(name) -> str:
+    """Case, punctuation and spacing insensitive customer key"""
+    if name is None:
+        return None
+    key = re.sub(r"[^0-9a-z]+", " ", str(name).lower()).strip()
+    return key or None
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in ("", "NA") else value
+
+
+def _entry(table_name: str, row_id: int, epicor_no, oa, customer_name) -> dict:
+    return {
+        "table_name": table_name,
+        "row_id": row_id,
+        "epicor_no": _clean(epicor_no),
+        "oa": _clean(oa),
+        "customer_key": normalize_customer(_clean(customer_name)),
+        "customer_name": _clean(customer_name),
+    }
+
+
+def _source_columns(table):
+    by_name = {c.name: c for c in table.columns}
+    return [by_name.get(name) for name in INDEXED_COLUMNS]
+
+
+def index_row(db: Session, table, row_id: int, values: dict):
+    """(Re)index one row; `values` is keyed by column name. The caller commits."""
+    ensure_table(_index)
+    db.execute(delete(_index).where(_index.c.table_name == table.name, _index.c.row_id == row_id))
+    db.execute(insert(_index), [_entry(table.name, row_id, *(values.get(name) for name in INDEXED_COLUMNS))])
+
+
+def index_rows(db: Session, table, rows):
+    """(Re)index [(row_id, values keyed by column name)] in one go. The caller commits."""
+    if not rows:
+        return
+    ensure_table(_index)
+    db.execute(delete(_index).where(_index.c.table_name == table.name, _index.c.row_id.in_([r[0] for r in rows])))
+    db.execute(insert(_index), [_entry(table.name, row_id, *(values.get(name) for name in INDEXED_COLUMNS)) for row_id, values in rows])
+
+
+def index_object(db: Session, obj):
+    """(Re)index a mapped month-table row after its attributes were set"""
+    table = obj.__table__
+    if obj.id is None:
+        db.flush()
+    index_row(db, table, obj.id, {c.name: getattr(obj, c.key, None) for c in table.columns})
+
+
+def unindex_row(db: Session, table_name: str, row_id: int):
+    ensure_table(_index)
+    db.execute(delete(_index).where(_index.c.table_name == table_name, _index.c.row_id == row_id))
+
+
+def reindex_table(db: Session, table, batch_size: int = None) -> int:
+    """Replace every index entry of one month table from its current rows; the caller commits"""
+    ensure_table(_index)
+    db.execute(delete(_index).where(_index.c.table_name == table.name))
+    return _index_selected(db, table, None, batch_size)
+
+
+def index_new_rows(db: Session, table, after_id: int, batch_size: int = None) -> int:
+    """Index the rows with an id above `after_id`, i.e. those inserted since; the caller commits"""
+    ensure_table(_index)
+    db.execute(delete(_index).where(_index.c.table_name == table.name, _index.c.row_id > after_id))
+    return _index_selected(db, table, table.c.id > after_id, batch_size)
+
+
+def _index_selected(db: Session, table, where, batch_size: int = None) -> int:
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    cols = _source_columns(table)
+    selected = [table.c.id] + [c for c in cols if c is not None]
+    stmt = select(*selected)
+    if where is not None:
+        stmt = stmt.where(where)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+
+    indexed = 0
+    for part in result.partitions():
+        entries = []
+        for row in part:
+            values = dict(zip([c.name for c in selected], row))
+            entries.append(_entry(table.name, row[0], *(values.get(name) for name in INDEXED_COLUMNS)))
+        db.execute(insert(_index), entries)
+        indexed += len(entries)
+    return indexed
+
+
+def month_tables(bind) -> list:
+    return sorted(t for t in inspect(bind).get_table_names() if MONTH_TABLE.match(t))
+
+
+def rebuild_all(db: Session) -> dict:
+    """Re-index every month table, committing per table; returns {table: rows indexed}"""
+    from app.dynamic_table import get_table_class
+    from app.schedules import infer_sheet_type
+
+    counts = {}
+    for table_name in month_tables(db.get_bind()):
+        table = get_table_class(table_name, infer_sheet_type(table_name)).__table__
+        counts[table_name] = reindex_table(db, table)
+        db.commit()
+    return counts
+
+
+def search(db: Session, q: str, field: str = "any", limit: int = 50) -> list:
+    """Exact or prefix match on EPICOR NO / OA, prefix match on the normalized customer name"""
+    ensure_table(_index)
+    q = q.strip()
+    conditions = []
+    if field in ("any", "epicor"):
+        conditions.append(_index.c.epicor_no.like(_prefix(q), escape="\\"))
+    if field in ("any", "oa"):
+        conditions.append(_index.c.oa.like(_prefix(q), escape="\\"))
+    if field in ("any", "customer"):
+        key = normalize_customer(q)
+        if key:
+            conditions.append(_index.c.customer_key.like(_prefix(key), escape="\\"))
+    if not conditions:
+        return []
+
+    # newest month first: table names end in _mm_yy, so order by yy, then mm
+    yy = func.substr(_index.c.table_name, -2, 2)
+    mm = func.substr(_index.c.table_name, -5, 2)
+    stmt = (
+        select(_index.c.table_name, _index.c.row_id, _index.c.epicor_no, _index.c.oa, _index.c.customer_name)
+        .where(or_(*conditions))
+        .order_by(yy.desc(), mm.desc(), _index.c.table_name, _index.c.row_id)
+        .limit(limit)
+    )
+    return [dict(r) for r in db.execute(stmt).mappings()]
+
+
+def _prefix(value: str) -> str:
+    # LIKE 'value%' can still use the b-tree index; escape the wildcards of the input
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import SessionLocal, get_read_db, ensure_table
 from app.models import ShutdownJob
+from app.responses import model_listing
 
+# main.py mounts only the read-only listing; the unchecked POST stays off the app
 router = APIRouter()
+listing_router = APIRouter()
 
 
 def get_db():
@@ -12,9 +16,18 @@ def get_db():
     finally: db.close()
 
 
-@router.get("/")
-def fetch(db: Session = Depends(get_db)):
-    return db.query(ShutdownJob).all()
+@listing_router.get("/")
+def fetch(
+    request: Request,
+    shape: str = "rows",
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    fmt: str = Query("json", alias="format"),
+    db: Session = Depends(get_read_db),
+):
+    ensure_table(ShutdownJob.__table__)
+    return model_listing(request, db, ShutdownJob, shape, fields, limit, after, fmt)
 
 
 @router.post("/")
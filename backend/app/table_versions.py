@@ -0,0 +1,78 @@
+import datetime
+import hashlib
+import json
+
+from fastapi import Request, Response
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import ensure_table, ensure_table_async
+from app.models import TableVersion
+
+# Every write to a month table bumps its row here (in the same transaction
+# where possible); reads turn the number into an ETag, so an unchanged
+# table answers 304 after one primary-key lookup instead of re-reading rows.
+
+# browsers may keep the response but must revalidate it every time
+CACHE_CONTROL = "private, no-cache"
+
+_versions = TableVersion.__table__
+
+
+def get_version(db: Session, table_name: str) -> int:
+    ensure_table(_versions)
+    version = db.execute(select(_versions.c.version).where(_versions.c.table_name == table_name)).scalar()
+    return version or 0
+
+
+
+async def get_version_async(db, table_name: str) -> int:
+    """get_version on an AsyncSession"""
+    await ensure_table_async(_versions)
+    version = (await db.execute(select(_versions.c.version).where(_versions.c.table_name == table_name))).scalar()
+    return version or 0
+
+
+def bump_version(db: Session, table_name: str):
+    """Increment the table's version; the caller commits"""
+    ensure_table(_versions)
+    now = datetime.datetime.utcnow()
+    bump = (
+        update(_versions)
+        .where(_versions.c.table_name == table_name)
+        .values(version=_versions.c.version + 1, updated_at=now)
+    )
+    if db.execute(bump).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(_versions).values(table_name=table_name, version=1, updated_at=now))
+    except IntegrityError:
+        # another writer created the row first
+        db.execute(bump)
+
+
+def table_etag(table_name: str, version: int, variant=None) -> str:
+    """Weak ETag for one representation (query / body in `variant`) of a table version"""
+    digest = hashlib.sha1(json.dumps(variant, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return f'W/"{table_name}.{version}.{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: W/ prefixes are ignored
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
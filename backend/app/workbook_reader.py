@@ -0,0 +1,78 @@
+from fastapi import HTTPException
+from openpyxl import load_workbook
+import pandas as pd
+from app.config import settings
+
+# The header row is the first row holding this cell; sheets often carry
+# title / junk rows above it.
+HEADER_MARKER = "OA"
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+class WorkbookReader:
+    """Single pass, bounded-memory reader for uploaded schedule workbooks.
+
+    Opens the first sheet with openpyxl in read-only mode, which parses the
+    XML lazily, finds the header row on the way and then hands out the data
+    rows as DataFrame chunks of at most `chunk_size` rows, with the cell
+    types openpyxl already produced (datetime, int, float, str).
+    """
+
+    def __init__(self, fileobj, required_columns=(), chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.IMPORT_READ_CHUNK
+        try:
+            self._wb = load_workbook(fileobj, read_only=True, data_only=True)
+        except Exception:
+            raise HTTPException(status_code=400, detail="could not process uploaded Excel file")
+
+        ws = self._wb.active
+        self._rows = ws.iter_rows(values_only=True)
+
+        self.header_row = None
+        for idx, row in enumerate(self._rows):
+            if any(_clean(v) == HEADER_MARKER for v in row):
+                self.header_row = idx
+                self.headers = [str(_clean(v)) if v is not None else "" for v in row]
+                break
+
+        if self.header_row is None:
+            self.close()
+            raise HTTPException(
+                status_code=400,
+                detail="Could not detect header row (OA not found)",
+            )
+
+        missing = set(required_columns) - set(self.headers)
+        if missing:
+            self.close()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing columns: {missing}",
+            )
+
+        # sheet dimension from the file, good enough for progress reporting
+        self.rows_estimate = max((ws.max_row or 0) - self.header_row - 1, 0) or None
+
+    def chunks(self):
+        """Yield DataFrames (object dtype) of the data rows; blank rows are skipped"""
+        width = len(self.headers)
+        buf = []
+        try:
+            for row in self._rows:
+                if all(v is None or (isinstance(v, str) and not v.strip()) for v in row):
+                    continue
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                buf.append(row)
+                if len(buf) >= self.chunk_size:
+                    yield pd.DataFrame(buf, columns=self.headers, dtype=object)
+                    buf = []
+            if buf:
+                yield pd.DataFrame(buf, columns=self.headers, dtype=object)
+        finally:
+            self.close()
+
+    def close(self):
+        self._wb.close()
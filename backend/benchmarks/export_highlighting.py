@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare the old per-cell export highlighting with conditional formatting.
+
+Runs without a database: rows are generated in memory and both variants
+write a coloured group_a workbook to a temp file.
+
+    python -m benchmarks.export_highlighting --rows 50000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from app.dynamic_table import GROUP_A_HEADERS, GROUP_A_DATE_COLS
+from app.exporter import write_xlsx
+from xlsxwriter.utility import xl_rowcol_to_cell
+
+
+def make_rows(n: int):
+    rnd = random.Random(42)
+    start = datetime.date(2025, 1, 1)
+    for i in range(n):
+        row = []
+        for h in GROUP_A_HEADERS:
+            if h in GROUP_A_DATE_COLS:
+                row.append(None if rnd.random() < 0.3 else start + datetime.timedelta(days=rnd.randint(0, 365)))
+            elif h == "QTY":
+                row.append(rnd.randint(1, 20))
+            elif h == "AMOUNT":
+                row.append(round(rnd.uniform(100, 100000), 2))
+            elif h == "REMARKS":
+                row.append(rnd.choice(["", "NA", "awaiting drawings", "expedite"]))
+            else:
+                row.append(f"{h[:4]}-{i}")
+        yield row
+
+
+def legacy_export(path: str, rows):
+    """The pre-conditional-format export: DataFrame write, then per-cell rewrites"""
+    df = pd.DataFrame(list(rows), columns=GROUP_A_HEADERS)
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name="bench")
+        workbook = writer.book
+        worksheet = writer.sheets["bench"]
+        green_fmt = workbook.add_format({"bg_color": "#90EE90"})
+        remarks_fmt = workbook.add_format({"bg_color": "#FFF9C4"})
+        for idx, col in enumerate(df.columns):
+            if col in GROUP_A_DATE_COLS:
+                for row_idx in range(len(df)):
+                    cell_value = df.iloc[row_idx, idx]
+                    if pd.notna(cell_value) and cell_value != "NA":
+                        worksheet.write(row_idx + 1, idx, cell_value, green_fmt)
+            if col == "REMARKS":
+                for row_idx in range(len(df)):
+                    cell_value = df.iloc[row_idx, idx]
+                    if pd.notna(cell_value) and cell_value != "NA" and str(cell_value).strip():
+                        worksheet.write(row_idx + 1, idx, cell_value, remarks_fmt)
+
+
+def conditional_export(path: str, rows):
+    green = ({"bg_color": "#90EE90"}, {"type": "no_blanks"})
+    highlights = {idx: green for idx, h in enumerate(GROUP_A_HEADERS) if h in GROUP_A_DATE_COLS}
+    idx = GROUP_A_HEADERS.index("REMARKS")
+    cell = xl_rowcol_to_cell(1, idx)
+    highlights[idx] = (
+        {"bg_color": "#FFF9C4"},
+        {"type": "formula", "criteria": f'=AND(TRIM({cell})<>"",{cell}<>"NA")'},
+    )
+    tmp = write_xlsx("bench", GROUP_A_HEADERS, rows, highlights)
+    os.replace(tmp, path)
+
+
+def timed(fn, rows: int) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        fn(path, make_rows(rows))
+        elapsed = time.perf_counter() - started
+        return {
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1),
+            "bytes": os.path.getsize(path),
+        }
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    report = {
+        "rows": args.rows,
+        "legacy_per_cell": timed(legacy_export, args.rows),
+        "conditional_format": timed(conditional_export, args.rows),
+    }
+    report["speedup"] = round(
+        report["legacy_per_cell"]["seconds"] / report["conditional_format"]["seconds"], 2
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
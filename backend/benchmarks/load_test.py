@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""Load test of the authenticated table workflow, as the frontend drives it.
+
+Every virtual user logs in (/auth/login), opens a month table the way
+TableSelector does (POST /schedules/open_table with If-None-Match), then
+loops over DataTable actions picked by --mix: page through rows, add, edit
+and delete rows, export, and import through an import job it polls until
+done. Users run closed-loop (next action once the last one answered, plus
+--think seconds) for --duration seconds per stage; giving several --users
+counts runs one stage each, which is how to find the saturation point:
+throughput stops growing while p99 and the error rate climb.
+
+Without --url a uvicorn server is started in a subprocess on a temporary
+SQLite database (--workers processes); with --url an already running
+instance is used, e.g. a local uvicorn on MySQL.
+
+    python -m benchmarks.load_test --users 5,10,20,40 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --mix page=80,edit=20
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.suite import percentile
+
+DEFAULT_MIX = "page=45,open=10,edit=20,add=10,delete=5,export=5,import=5"
+ACTIONS = ("page", "open", "edit", "add", "delete", "export", "import")
+
+
+def parse_mix(raw: str) -> dict:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise SystemExit(f"unknown action in --mix: {name!r}, expected one of {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    """Latency samples and status codes per endpoint (method + route template)"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, ok=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.samples[label].append(time.perf_counter() - started)
+            self.statuses[label][type(e).__name__] += 1
+            self.errors[label] += 1
+            return None
+        self.samples[label].append(time.perf_counter() - started)
+        self.statuses[label][str(response.status_code)] += 1
+        if response.status_code not in ok:
+            self.errors[label] += 1
+            return None
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label in sorted(self.samples):
+            samples = self.samples[label]
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "error_rate": round(self.errors[label] / len(samples), 4),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p90_ms": round(percentile(samples, 90) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "max_ms": round(max(samples) * 1000, 1),
+                "statuses": dict(self.statuses[label]),
+            }
+        total = sum(len(s) for s in self.samples.values())
+        errors = sum(self.errors.values())
+        every = [x for s in self.samples.values() for x in s]
+        return {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0,
+            "rps": round(total / elapsed, 2),
+            "p50_ms": round(percentile(every, 50) * 1000, 1) if every else None,
+            "p99_ms": round(percentile(every, 99) * 1000, 1) if every else None,
+            "endpoints": endpoints,
+        }
+
+# ===== VIRTUAL USER =====
+
+class VirtualUser:
+    def __init__(self, n: int, client: httpx.AsyncClient, rec: Recorder, table: str, opts: dict, workbook: bytes, epicor_seq):
+        self.n = n
+        self.client = client
+        self.rec = rec
+        self.table = table
+        self.opts = opts
+        self.workbook = workbook
+        self.epicor_seq = epicor_seq
+        self.rnd = random.Random(n)
+        self.rows = []  # last page seen, edit targets
+        self.cursor = None
+        self.added = []  # ids this user created, delete targets
+        self.open_etag = None
+
+    async def login(self):
+        response = await self.rec.request(
+            self.client, "POST /auth/login", "POST", "/auth/login",
+            json={"email": self.opts["email"], "password": self.opts["password"]},
+        )
+        if response is None:
+            raise RuntimeError("login failed")
+        self.client.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+    async def open(self):
+        sheet_type, mm, yy = self.table.rsplit("_", 2)
+        body = {"sheet_type": sheet_type, "month": mm, "year": yy, "limit": 100}
+        headers = {"If-None-Match": self.open_etag} if self.open_etag else {}
+        response = await self.rec.request(
+            self.client, "POST /schedules/open_table", "POST", "/schedules/open_table",
+            ok=(200, 304), json=body, headers=headers,
+        )
+        if response is not None and response.status_code == 200:
+            self.open_etag = response.headers.get("etag")
+            self.rows = response.json()["rows"] or self.rows
+
+    async def page(self):
+        # mostly the next page, sometimes back to the first one with a sort
+        params = {"limit": self.opts["page_size"]}
+        if self.cursor and self.rnd.random() < 0.7:
+            params["cursor"] = self.cursor
+        elif self.rnd.random() < 0.3:
+            params["sort"] = self.rnd.choice(["EDD", "-AMOUNT", "CUSTOMER NAME"])
+        response = await self.rec.request(
+            self.client, "GET /schedules/rows/{table}", "GET", f"/schedules/rows/{self.table}", params=params,
+        )
+        if response is not None:
+            data = response.json()
+            self.rows = data["rows"] or self.rows
+            self.cursor = data.get("next_cursor")
+
+    def _form(self, row: dict) -> dict:
+        # RowFormDialog sends every header, blanks as "NA"
+        return {k: ("NA" if v in ("", None) else v) for k, v in row.items() if k != "id"}
+
+    async def edit(self):
+        if not self.rows:
+            return await self.page()
+        row = dict(self.rnd.choice(self.rows))
+        row["REMARKS"] = f"load test {self.n} {time.time():.0f}"
+        await self.rec.request(
+            self.client, "PUT /schedules/rows/{table}/{id}", "PUT", f"/schedules/rows/{self.table}/{row['id']}",
+            json=self._form(row),
+        )
+
+    async def add(self):
+        template = self.rnd.choice(self.rows) if self.rows else {"OA": "OA/LOAD"}
+        row = dict(template, **{"EPICOR NO": f"LT{next(self.epicor_seq)}", "REMARKS": f"added by user {self.n}"})
+        response = await self.rec.request(
+            self.client, "POST /schedules/rows/{table}", "POST", f"/schedules/rows/{self.table}", json=self._form(row),
+        )
+        if response is not None:
+            self.added.append(response.json()["id"])
+
+    async def delete(self):
+        # only rows this user added, so the table keeps its size
+        if not self.added:
+            return await self.add()
+        row_id = self.added.pop()
+        await self.rec.request(
+            self.client, "DELETE /schedules/rows/{table}/{id}", "DELETE", f"/schedules/rows/{self.table}/{row_id}",
+        )
+
+    async def export(self):
+        await self.rec.request(self.client, "GET /schedules/export/{table}", "GET", f"/schedules/export/{self.table}")
+
+    async def import_(self):
+        files = {"file": ("load.xlsx", self.workbook, "application/octet-stream")}
+        response = await self.rec.request(
+            self.client, "POST /schedules/import_jobs/{table}", "POST", f"/schedules/import_jobs/{self.table}",
+            ok=(202,), params={"mode": "upsert"}, files=files,
+        )
+        if response is None:
+            return
+        status_url = response.json()["status_url"]
+        while True:
+            await asyncio.sleep(self.opts["poll_interval"])
+            job = await self.rec.request(self.client, "GET /schedules/import_jobs/{job_id}", "GET", status_url)
+            if job is None or job.json()["phase"] in ("done", "failed", "cancelled"):
+                break
+
+    async def run(self, weights: dict, deadline: float):
+        actions = {
+            "page": self.page, "open": self.open, "edit": self.edit, "add": self.add,
+            "delete": self.delete, "export": self.export, "import": self.import_,
+        }
+        names, cum = list(weights), list(itertools.accumulate(weights.values()))
+        await self.login()
+        await self.open()
+        while time.monotonic() < deadline:
+            await actions[self.rnd.choices(names, cum_weights=cum)[0]]()
+            if self.opts["think"]:
+                await asyncio.sleep(self.rnd.uniform(0, 2 * self.opts["think"]))
+
+# ===== STAGES =====
+
+async def seed(base_url: str, opts: dict, tables: list, workbook: bytes):
+    async with httpx.AsyncClient(base_url=base_url, timeout=opts["timeout"]) as client:
+        response = await client.post("/auth/login", json={"email": opts["email"], "password": opts["password"]})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['token']}"}
+        for table in tables:
+            files = {"file": ("seed.xlsx", workbook, "application/octet-stream")}
+            response = await client.post(f"/schedules/import/{table}", params={"mode": "replace"}, files=files, headers=headers)
+            response.raise_for_status()
+
+
+async def run_stage(base_url: str, users: int, opts: dict, weights: dict, tables: list, workbook: bytes, epicor_seq) -> dict:
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    deadline = time.monotonic() + opts["duration"]
+    started = time.perf_counter()
+    # one connection pool, a client (own Authorization header) per user
+    async with httpx.AsyncHTTPTransport(limits=limits) as transport:
+        vusers = [
+            VirtualUser(
+                n, httpx.AsyncClient(base_url=base_url, timeout=opts["timeout"], transport=transport),
+                rec, tables[n % len(tables)], opts, workbook, epicor_seq,
+            )
+            for n in range(users)
+        ]
+        results = await asyncio.gather(*(u.run(weights, deadline) for u in vusers), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    report = {"users": users, "seconds": round(elapsed, 1), **rec.report(elapsed)}
+    failed = [f"{type(r).__name__}: {r}" for r in results if isinstance(r, Exception)]
+    if failed:
+        report["user_failures"] = failed[:10]
+    return report
+
+# ===== LOCAL SERVER =====
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int):
+    """uvicorn on a temporary SQLite database; returns (process, base url)"""
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        LOG_FILE=os.path.join(workdir, "app.log"),
+    )
+    # create the static tables first, as init_db would
+    subprocess.run(
+        [sys.executable, "-c", "from app.database import Base, engine; import app.models; Base.metadata.create_all(bind=engine)"],
+        env=env, check=True,
+    )
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            raise SystemExit("uvicorn exited during startup")
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("uvicorn did not come up")
+
+
+async def run(args) -> dict:
+    from benchmarks.workbooks import make_workbook
+
+    opts = {
+        "duration": args.duration, "think": args.think, "page_size": args.page_size, "timeout": args.timeout,
+        "poll_interval": args.poll_interval, "email": args.email, "password": args.password,
+    }
+    weights = parse_mix(args.mix)
+    tables = [f"group_a_{m:02d}_99" for m in range(1, args.tables + 1)]
+    seed_book = make_workbook("group_a", args.rows)
+    import_book = make_workbook("group_a", args.import_rows)
+    # EPICOR NO is unique per table; keep added rows clear of the seeded ones
+    epicor_seq = itertools.count(int(time.time()))
+
+    await seed(args.url, opts, tables, seed_book)
+    stages = []
+    for users in args.users:
+        print(f"stage: {users} users for {args.duration}s ...", file=sys.stderr)
+        stages.append(await run_stage(args.url, users, opts, weights, tables, import_book, epicor_seq))
+    return {
+        "target": args.url,
+        "config": {**{k: v for k, v in opts.items() if k != "password"}, "mix": weights, "tables": tables, "seed_rows": args.rows},
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running instance to test; default starts a local uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument("--users", default="10", help="concurrent users, comma separated for several stages")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per stage")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="action weights, e.g. page=50,edit=30,export=20")
+    parser.add_argument("--think", type=float, default=0, help="mean pause between a user's actions, seconds")
+    parser.add_argument("--tables", type=int, default=1, help="month tables to spread users over")
+    parser.add_argument("--rows", type=int, default=2000, help="rows seeded per table")
+    parser.add_argument("--import-rows", type=int, default=500, help="rows per uploaded import workbook")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="import job polling, as the frontend does")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--email", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+    args.users = [int(u) for u in args.users.split(",")]
+
+    proc = None
+    if not args.url:
+        proc, args.url = start_server(args.workers)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
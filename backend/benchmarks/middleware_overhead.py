@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Per-request overhead of the upload / freeze middlewares, old vs new.
+
+Drives a bare Starlette app directly over ASGI (no server, no sockets), once
+wrapped in the former BaseHTTPMiddleware classes and once in the plain ASGI
+ones from app.middleware, and reports microseconds per request.
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middleware import MaxUploadSizeMiddleware, FreezeWritesMiddleware
+
+MAX_SIZE = 5 * 1024 * 1024
+
+
+class LegacyMaxUploadSizeMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, max_size: int):
+        super().__init__(app)
+        self.max_size = max_size
+
+    async def dispatch(self, request: Request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length:
+            try:
+                if int(content_length) > self.max_size:
+                    return JSONResponse({"detail": "Request body too large"}, status_code=413)
+            except ValueError:
+                pass
+        return await call_next(request)
+
+
+class LegacyFreezeWritesMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, allow_write: bool):
+        super().__init__(app)
+        self.allow_write = allow_write
+
+    async def dispatch(self, request: Request, call_next):
+        if not self.allow_write and request.method in ("POST", "PUT", "PATCH", "DELETE"):
+            return JSONResponse({"detail": "Modifications temporarily disabled"}, status_code=403)
+        return await call_next(request)
+
+
+async def ping(request):
+    return PlainTextResponse("ok")
+
+
+async def upload(request):
+    body = await request.body()
+    return PlainTextResponse(str(len(body)))
+
+
+async def stream(request):
+    async def chunks():
+        for _ in range(20):
+            yield b"x" * 4096
+    return StreamingResponse(chunks())
+
+
+def build_app(upload_mw, freeze_mw):
+    app = Starlette(routes=[
+        Route("/ping", ping),
+        Route("/upload", upload, methods=["POST"]),
+        Route("/stream", stream),
+    ])
+    app.add_middleware(upload_mw, max_size=MAX_SIZE)
+    app.add_middleware(freeze_mw, allow_write=True)
+    return app
+
+
+async def call(app, method: str, path: str, body: bytes = b""):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"content-length", str(len(body)).encode())],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, method: str, path: str, n: int, body: bytes = b"") -> float:
+    for _ in range(200):
+        await call(app, method, path, body)
+    started = time.perf_counter()
+    for _ in range(n):
+        await call(app, method, path, body)
+    return round((time.perf_counter() - started) / n * 1e6, 1)
+
+
+async def run(n: int) -> dict:
+    apps = {
+        "base_http_middleware": build_app(LegacyMaxUploadSizeMiddleware, LegacyFreezeWritesMiddleware),
+        "pure_asgi": build_app(MaxUploadSizeMiddleware, FreezeWritesMiddleware),
+    }
+    body = b"x" * 64 * 1024
+    report = {"requests": n, "us_per_request": {}}
+    for name, app in apps.items():
+        report["us_per_request"][name] = {
+            "GET /ping": await measure(app, "GET", "/ping", n),
+            "POST /upload 64KB": await measure(app, "POST", "/upload", n, body),
+            "GET /stream": await measure(app, "GET", "/stream", n),
+        }
+    old, new = report["us_per_request"].values()
+    report["speedup"] = {k: round(old[k] / new[k], 2) for k in old}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
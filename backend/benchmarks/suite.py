@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Import / export / listing benchmarks through the FastAPI app.
+
+Each scenario runs in a fresh process against its own SQLite file (or the
+--database-url given, e.g. a local MySQL), logs in as the built-in admin,
+seeds what it needs from a synthetic workbook (see benchmarks.workbooks) and
+times `--repeat` requests. The JSON report holds per scenario latency
+percentiles, rows/sec and the process' peak RSS, plus enough metadata to
+compare two runs:
+
+    python -m benchmarks.suite --rows 20000 --output bench.json
+    python -m benchmarks.suite --rows 20000 --compare bench.json
+
+Month tables use year 99 so a shared database keeps its real tables.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS in the report
+    resource = None
+
+TABLE = "group_a_01_99"
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: {response.status_code} {response.text[:200]}")
+    return response
+
+
+def _workbook(opts, sheet_type: str = "group_a") -> bytes:
+    from benchmarks.workbooks import make_workbook
+    return make_workbook(sheet_type, opts["rows"], opts["junk_rows"])
+
+
+def _seed(client, headers, opts):
+    files = {"file": ("bench.xlsx", _workbook(opts), "application/octet-stream")}
+    _check(client.post(f"/schedules/import/{TABLE}?mode=replace", files=files, headers=headers))
+
+# ===== SCENARIOS =====
+# Each returns (timed callable, rows handled per call or None).
+
+def scenario_schedules_import(client, headers, opts):
+    body = _workbook(opts)
+
+    def run():
+        files = {"file": ("bench.xlsx", body, "application/octet-stream")}
+        _check(client.post(f"/schedules/import/{TABLE}?mode=replace", files=files, headers=headers))
+    return run, opts["rows"]
+
+
+def scenario_files_import(client, headers, opts):
+    body = _workbook(opts, "shutdown")
+
+    def run():
+        files = {"file": ("bench.xlsx", body, "application/octet-stream")}
+        _check(client.post("/files/import/shutdown/01/99?mode=replace", files=files, headers=headers))
+    return run, opts["rows"]
+
+
+def scenario_schedules_export(client, headers, opts):
+    _seed(client, headers, opts)
+    return (lambda: _check(client.get(f"/schedules/export/{TABLE}", headers=headers))), opts["rows"]
+
+
+def scenario_files_export(client, headers, opts):
+    _seed(client, headers, opts)
+    return (lambda: _check(client.get("/files/export/group_a/01/99", headers=headers))), opts["rows"]
+
+
+def scenario_open_table(client, headers, opts):
+    _seed(client, headers, opts)
+    req = {"sheet_type": "group_a", "month": "01", "year": "2099", "limit": opts["page_size"]}
+
+    def run():
+        rows = _check(client.post("/schedules/open_table", json=req, headers=headers)).json()["rows"]
+        assert rows, "open_table returned no rows"
+    return run, min(opts["rows"], opts["page_size"])
+
+
+def scenario_list_rows(client, headers, opts):
+    _seed(client, headers, opts)
+    url = f"/schedules/rows/{TABLE}?limit={opts['page_size']}&sort=EDD"
+    return (lambda: _check(client.get(url, headers=headers))), min(opts["rows"], opts["page_size"])
+
+
+def scenario_table_class_cold(client, headers, opts):
+    from app.dynamic_table import get_table_class, invalidate_table
+    get_table_class(TABLE)
+
+    def run():
+        invalidate_table(TABLE)
+        get_table_class(TABLE)
+    return run, None
+
+
+def scenario_table_class_warm(client, headers, opts):
+    from app.dynamic_table import get_table_class
+    get_table_class(TABLE)
+    return (lambda: get_table_class(TABLE)), None
+
+
+SCENARIOS = {
+    "schedules_import": scenario_schedules_import,
+    "files_import": scenario_files_import,
+    "schedules_export": scenario_schedules_export,
+    "files_export": scenario_files_export,
+    "open_table": scenario_open_table,
+    "list_rows": scenario_list_rows,
+    "table_class_cold": scenario_table_class_cold,
+    "table_class_warm": scenario_table_class_warm,
+}
+
+# ===== RUNNER =====
+
+def run_scenario(name: str, opts: dict) -> dict:
+    """Run one scenario; meant for a fresh process, since the app reads settings on import"""
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    os.environ["DATABASE_URL"] = opts["database_url"] or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LOG_FILE"] = os.path.join(workdir, "app.log")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from fastapi.testclient import TestClient
+    from app.database import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as client:
+        token = _check(client.post("/auth/login", json={"email": "admin", "password": "admin123"})).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        run, rows = SCENARIOS[name](client, headers, opts)
+        for _ in range(opts["warmup"]):
+            run()
+
+        samples = []
+        for _ in range(opts["repeat"]):
+            started = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - started)
+
+    result = {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if rows:
+        result["rows"] = rows
+        result["rows_per_sec"] = round(rows * len(samples) / sum(samples), 1)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _database_label(url: str) -> str:
+    if not url:
+        return "sqlite (temporary file)"
+    from sqlalchemy.engine import make_url
+    return make_url(url).render_as_string(hide_password=True)
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """new / old ratios per scenario: p50 below 1 and rows/sec above 1 are improvements"""
+    out = {}
+    for name, new in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or "error" in new or "error" in old:
+            continue
+        entry = {"p50": round(new["p50_ms"] / old["p50_ms"], 3) if old["p50_ms"] else None}
+        if new.get("rows_per_sec") and old.get("rows_per_sec"):
+            entry["rows_per_sec"] = round(new["rows_per_sec"] / old["rows_per_sec"], 3)
+        if new.get("peak_rss_mb") and old.get("peak_rss_mb"):
+            entry["peak_rss_mb"] = round(new["peak_rss_mb"] / old["peak_rss_mb"], 3)
+        out[name] = entry
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="rows per generated workbook")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per scenario")
+    parser.add_argument("--page-size", type=int, default=500, help="limit for open_table / list_rows")
+    parser.add_argument("--junk-rows", type=int, default=2, help="title / blank rows above the header")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these (repeatable)")
+    parser.add_argument("--database-url", default="", help="database to run against instead of a temporary SQLite file")
+    parser.add_argument("--in-process", action="store_true", help="run every scenario in this process (shared peak RSS)")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    parser.add_argument("--compare", help="earlier report to compute ratios against")
+    args = parser.parse_args()
+
+    opts = {
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "page_size": args.page_size,
+        "junk_rows": args.junk_rows,
+        "database_url": args.database_url,
+    }
+    report = {
+        "meta": {
+            "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": _database_label(args.database_url),
+        },
+        "config": {k: v for k, v in opts.items() if k != "database_url"},
+        "results": {},
+    }
+
+    for name in args.scenario or list(SCENARIOS):
+        print(f"running {name} ...", file=sys.stderr)
+        try:
+            if args.in_process:
+                result = run_scenario(name, opts)
+            else:
+                ctx = multiprocessing.get_context("spawn")
+                with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    result = pool.submit(run_scenario, name, opts).result()
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        report["results"][name] = result
+
+    if args.compare:
+        with open(args.compare) as f:
+            report["vs_baseline"] = compare(report, json.load(f))
+
+    out = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Synthetic Group A / shutdown workbooks and rows for the benchmarks.
+
+The sheets look like the planners' uploads: a title and a blank line above
+the OA header row, dates typed as real Excel dates or as text (dd/mm/yyyy,
+several in one cell), "NA" and blank cells, and the odd untidy number.
+"""
+
+import datetime
+import io
+import random
+
+import xlsxwriter
+
+from app.dynamic_table import GROUP_A_HEADERS, SHUTDOWN_HEADERS, GROUP_A_DATE_COLS, SHUTDOWN_DATE_COLS
+
+CUSTOMERS = [
+    "Acme Industries Pvt Ltd", "ACME INDUSTRIES PVT. LTD.", "Bharat Fans & Blowers",
+    "Kirloskar Ventilation", "Tata Projects Ltd", "L&T Construction", "Nordic Air AB",
+]
+STATUSES = ["IN PROGRESS", "ON HOLD", "COMPLETED", "NA", ""]
+REMARKS = ["", "NA", "awaiting drawings", "expedite - customer call 12/03", "payment pending", None]
+
+
+def headers_for(sheet_type: str):
+    return SHUTDOWN_HEADERS if sheet_type == "shutdown" else GROUP_A_HEADERS
+
+
+def _date_cols(sheet_type: str):
+    return SHUTDOWN_DATE_COLS if sheet_type == "shutdown" else GROUP_A_DATE_COLS
+
+
+def _messy_date(rnd: random.Random, start: datetime.date):
+    day = start + datetime.timedelta(days=rnd.randint(0, 365))
+    pick = rnd.random()
+    if pick < 0.35:
+        return day  # a real Excel date
+    if pick < 0.55:
+        return day.strftime("%d/%m/%Y")
+    if pick < 0.70:
+        # revised dates stacked in one cell, earliest wins on import
+        later = day + datetime.timedelta(days=rnd.randint(1, 60))
+        sep = rnd.choice(["\n", ", ", "; "])
+        return f"{later.strftime('%d/%m/%Y')}{sep}{day.strftime('%d/%m/%Y')}"
+    if pick < 0.82:
+        return "NA"
+    return None
+
+
+def make_rows(sheet_type: str, rows: int, seed: int = 42, start: int = 0):
+    """Raw cell values per row in header order, as a planner would type them"""
+    rnd = random.Random(seed)
+    first_day = datetime.date(2025, 1, 1)
+    date_cols = _date_cols(sheet_type)
+    for i in range(start, start + rows):
+        row = []
+        for h in headers_for(sheet_type):
+            if h == "OA":
+                row.append(f"OA/{25000 + i}")
+            elif h == "EPICOR NO":
+                row.append(f"EP{100000 + i}")
+            elif h == "CUSTOMER NAME":
+                row.append(rnd.choice(CUSTOMERS))
+            elif h in date_cols:
+                row.append(_messy_date(rnd, first_day))
+            elif h == "QTY":
+                row.append(rnd.choice([rnd.randint(1, 40), rnd.randint(1, 40), "NA", None]))
+            elif h == "AMOUNT":
+                row.append(rnd.choice([round(rnd.uniform(1000, 2500000), 2), round(rnd.uniform(1000, 2500000), 2), "NA"]))
+            elif h in ("PROJECT STATUS", "FACTORY STATUS"):
+                row.append(rnd.choice(STATUSES))
+            elif h == "REMARKS":
+                row.append(rnd.choice(REMARKS))
+            else:
+                row.append(f"{h[:3]}-{rnd.randint(1, 30)}")
+        yield row
+
+
+def make_workbook(sheet_type: str = "group_a", rows: int = 1000, junk_rows: int = 2, seed: int = 42) -> bytes:
+    """An .xlsx upload with `junk_rows` title / blank rows above the header"""
+    buf = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buf, {"constant_memory": True, "in_memory": True})
+    worksheet = workbook.add_worksheet("Schedule")
+    date_fmt = workbook.add_format({"num_format": "dd/mm/yyyy"})
+
+    for r in range(junk_rows):
+        # a title line, then blank spacer rows
+        if r == 0:
+            worksheet.write(r, 0, f"{sheet_type.upper()} PRODUCTION SCHEDULE")
+    header_row = junk_rows
+    worksheet.write_row(header_row, 0, headers_for(sheet_type))
+
+    for r, row in enumerate(make_rows(sheet_type, rows, seed), start=header_row + 1):
+        for c, value in enumerate(row):
+            if value is None:
+                continue
+            if isinstance(value, datetime.date):
+                worksheet.write_datetime(r, c, datetime.datetime.combine(value, datetime.time()), date_fmt)
+            else:
+                worksheet.write(r, c, value)
+
+    workbook.close()
+    return buf.getvalue()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+
+from app.database import SessionLocal
+from app.search_index import rebuild_all
+import sys
+
+def rebuild_search_index():
+    print("Rebuilding the order search index...")
+    db = SessionLocal()
+    try:
+        counts = rebuild_all(db)
+        for table_name, rows in counts.items():
+            print(f"  {table_name}: {rows} rows")
+        print(f"Indexed {sum(counts.values())} rows from {len(counts)} tables")
+    except Exception as e:
+        print(f"Error rebuilding search index: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+from sqlalchemy import Column, Integer
+
+from app.coercion import coerce_frame, coerce_series, coerce_value
+
+QTY = Column("QTY", Integer, key="QTY")
+
+
+@pytest.mark.parametrize("raw", ["5.7", "12.0", "1e3", " 7 ", "-3", "abc", 5.7, 12.0, 4, "", "NA", None])
+def test_int_import_matches_crud(raw):
+    values, failed = coerce_series(pd.Series([raw], dtype=object), QTY)
+    assert values[0] == coerce_value(QTY, raw)
+
+
+def test_non_integral_strings_are_coercion_failures():
+    df = pd.DataFrame({"QTY": ["5.7", "12.0", "1e3", "12"]}, dtype=object)
+    records, failures = coerce_frame(df, [QTY])
+    assert [r["QTY"] for r in records] == [None, None, None, 12]
+    assert failures == [{"column": "QTY", "failed": 3, "samples": ["5.7", "12.0", "1e3"]}]
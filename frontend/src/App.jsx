@@ -3,19 +3,12 @@ import { useState } from "react";
 import LoginPage from "./pages/LoginPage";
 import TableSelector from "./pages/TableSelector";
 import DataTable from "./components/DataTable";
-import api from "./api/client";
 import "./styles/App.css";
 
 export default function App() {
   const [token, setToken] = useState(localStorage.getItem("token"));
   const [tableData, setTableData] = useState(null);
 
-  const refreshTable = async () => {
-    if (!tableData) return;
-    const res = await api.get(`/schedules/rows/${tableData.table_name}`);
-    setTableData(prev => ({ ...prev, rows: res.data.rows }));
-  };
-
   return (
     <Routes>
       {/* Always land on login */}
@@ -37,7 +30,7 @@ export default function App() {
             path="/table"
             element={
               tableData
-                ? <DataTable tableData={tableData} refresh={refreshTable} />
+                ? <DataTable key={tableData.table_name} tableData={tableData} />
                 : <Navigate to="/select" replace />
             }
           />
@@ -18,4 +18,49 @@ api.interceptors.request.use(
   }
 );
 
+// On 401, swap the refresh token for a new pair once and replay the request.
+// Concurrent 401s share a single refresh call.
+let refreshing = null;
+
+function refreshTokens() {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) {
+    return Promise.reject(new Error("no refresh token"));
+  }
+  return axios
+    .post(`${api.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken })
+    .then((res) => {
+      localStorage.setItem("token", res.data.token);
+      localStorage.setItem("refresh_token", res.data.refresh_token);
+      return res.data.token;
+    });
+}
+
+api.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    const original = error.config;
+    if (!error.response || error.response.status !== 401 || !original || original._retried) {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+
+    if (!refreshing) {
+      refreshing = refreshTokens().finally(() => {
+        refreshing = null;
+      });
+    }
+    return refreshing
+      .then((token) => {
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      })
+      .catch(() => {
+        localStorage.removeItem("token");
+        localStorage.removeItem("refresh_token");
+        return Promise.reject(error);
+      });
+  }
+);
+
 export default api;
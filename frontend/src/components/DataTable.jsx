@@ -26,15 +26,97 @@ function getDateColumnsForTable(tableName) {
   return GROUP_A_DATE_COLS;
 }
 
-export default function DataTable({ tableData, refresh }) {
+// DataGrid filter operators -> backend filter ops
+const FILTER_OPS = {
+  contains: "contains",
+  equals: "eq",
+  is: "eq",
+  "=": "eq",
+  "!=": "ne",
+  ">": "gt",
+  ">=": "gte",
+  "<": "lt",
+  "<=": "lte",
+};
+
+export default function DataTable({ tableData }) {
   const navigate = useNavigate();
-  const { table_name, headers = [], rows = [] } = tableData || {};
+  const { table_name, headers = [] } = tableData || {};
 
   const [openForm, setOpenForm] = useState(false);
   const [editingRow, setEditingRow] = useState(null);
 
+  /* =========================
+     PAGING (KEYSET CURSORS)
+     ========================= */
+  const [rows, setRows] = useState(tableData?.rows || []);
+  const [paginationModel, setPaginationModel] = useState({
+    page: 0,
+    pageSize: tableData?.limit || 100,
+  });
+  // pageCursors[i] is the cursor that fetches page i (page 0 has none)
+  const [pageCursors, setPageCursors] = useState([null, tableData?.next_cursor]);
+  const [totalEstimate, setTotalEstimate] = useState(tableData?.total_estimate ?? -1);
+  const [sortModel, setSortModel] = useState([]);
+  const [filterModel, setFilterModel] = useState({ items: [] });
+  const [loading, setLoading] = useState(false);
+
   const dateColumns = getDateColumnsForTable(table_name);
 
+  async function loadPage(page, pageSize, cursors, sort, filter) {
+    const params = new URLSearchParams({ limit: pageSize });
+    if (cursors[page]) params.append("cursor", cursors[page]);
+    if (sort.length) {
+      params.append("sort", (sort[0].sort === "desc" ? "-" : "") + sort[0].field);
+    }
+    filter.items.forEach((item) => {
+      const op = FILTER_OPS[item.operator];
+      if (op && item.value !== undefined && item.value !== "") {
+        params.append("filter", `${item.field}:${op}:${item.value}`);
+      }
+    });
+
+    setLoading(true);
+    try {
+      const res = await api.get(`/schedules/rows/${table_name}?${params}`);
+      const next = cursors.slice(0, page + 1);
+      next[page + 1] = res.data.next_cursor;
+      setPageCursors(next);
+      setRows(res.data.rows);
+      if (res.data.total_estimate !== null) {
+        setTotalEstimate(res.data.total_estimate);
+      }
+    } catch (err) {
+      console.error("Failed to load rows", err);
+    } finally {
+      setLoading(false);
+    }
+  }
+
+  function refresh() {
+    loadPage(paginationModel.page, paginationModel.pageSize, pageCursors, sortModel, filterModel);
+  }
+
+  function onPaginationModelChange(model) {
+    // a new page size invalidates every cursor after the first page
+    const cursors = model.pageSize === paginationModel.pageSize ? pageCursors : [null];
+    const page = model.pageSize === paginationModel.pageSize ? model.page : 0;
+    setPaginationModel({ page, pageSize: model.pageSize });
+    loadPage(page, model.pageSize, cursors, sortModel, filterModel);
+  }
+
+  function onSortModelChange(model) {
+    setSortModel(model);
+    setPaginationModel({ ...paginationModel, page: 0 });
+    loadPage(0, paginationModel.pageSize, [null], model, filterModel);
+  }
+
+  function onFilterModelChange(model) {
+    setFilterModel(model);
+    setPaginationModel({ ...paginationModel, page: 0 });
+    loadPage(0, paginationModel.pageSize, [null], sortModel, model);
+  }
+
   /* =========================
      ADD / EDIT
      ========================= */
@@ -113,15 +195,28 @@ export default function DataTable({ tableData, refresh }) {
     formData.append("file", file);
 
     try {
-      await api.post(
-        `/schedules/import/${table_name}`,
+      // the upload returns a job id right away; poll it until the load finishes
+      const res = await api.post(
+        `/schedules/import_jobs/${table_name}`,
         formData,
         { headers: { "Content-Type": "multipart/form-data" } }
       );
+
+      let job;
+      do {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await api.get(res.data.status_url)).data;
+      } while (!["done", "failed", "cancelled"].includes(job.phase));
+
+      if (job.phase !== "done") {
+        alert(`Import ${job.phase}: ${job.errors.join("; ")}`);
+      }
       refresh();
     } catch (err) {
       console.error("Import failed", err);
       alert("Import failed. Check Excel headers.");
+    } finally {
+      e.target.value = "";
     }
   }
 
@@ -220,7 +315,20 @@ export default function DataTable({ tableData, refresh }) {
             columns={columns}
             getRowId={(row) => row.id}
             disableRowSelectionOnClick
+            loading={loading}
             pageSizeOptions={[50, 100]}
+            paginationMode="server"
+            sortingMode="server"
+            filterMode="server"
+            rowCount={-1}
+            estimatedRowCount={totalEstimate}
+            paginationMeta={{ hasNextPage: !!pageCursors[paginationModel.page + 1] }}
+            paginationModel={paginationModel}
+            onPaginationModelChange={onPaginationModelChange}
+            sortModel={sortModel}
+            onSortModelChange={onSortModelChange}
+            filterModel={filterModel}
+            onFilterModelChange={onFilterModelChange}
           />
         </div>
 
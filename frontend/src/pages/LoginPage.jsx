@@ -12,6 +12,7 @@ export default function LoginPage({ setToken }) {
     try {
       const res = await api.post("/auth/login", { email, password });
       localStorage.setItem("token", res.data.token);
+      localStorage.setItem("refresh_token", res.data.refresh_token);
       setToken(res.data.token);
       navigate("/select"); 
     } catch (err) {
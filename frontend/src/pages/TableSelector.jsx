@@ -30,6 +30,11 @@ const MONTHS = [
 
 const YEARS = ["25", "26", "27", "28", "29", "30"];
 
+// Last open_table response per request body, with its ETag. Browsers do not
+// revalidate POSTs on their own, so send If-None-Match ourselves and reuse
+// the cached page when the table is unchanged (304).
+const openTableCache = new Map();
+
 export default function TableSelector({ setTableData }) {
   const [sheetType, setSheetType] = useState("urgent");
   const [month, setMonth] = useState("01");
@@ -37,13 +42,23 @@ export default function TableSelector({ setTableData }) {
   const navigate = useNavigate();
 
   async function openTable() {
-    const res = await api.post("/schedules/open_table", {
-      sheet_type: sheetType,
-      month,
-      year,
+    const body = { sheet_type: sheetType, month, year, limit: 100 };
+    const key = JSON.stringify(body);
+    const cached = openTableCache.get(key);
+
+    const res = await api.post("/schedules/open_table", body, {
+      headers: cached ? { "If-None-Match": cached.etag } : {},
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
     });
 
-    setTableData(res.data);
+    if (res.status === 304 && cached) {
+      setTableData(cached.data);
+    } else {
+      if (res.headers.etag) {
+        openTableCache.set(key, { etag: res.headers.etag, data: res.data });
+      }
+      setTableData(res.data);
+    }
     navigate("/table");
   }
 